@@ -14,9 +14,10 @@ sys.path.insert(0, os.path.abspath(os.getcwd()))
 from app.models.users import User  # your user model file
 from app.models.patients import PatientProfile
 from app.models.practitioners import PractitionerProfile
+from app.models.tokens import RefreshToken, RevokedToken
 
 # Import DB engine and Base
-from app.sessions.db import engine as target_engine
+from app.sessions.db import get_engine
 from app.sessions.db import Base
 
 config = context.config
@@ -41,7 +42,7 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 def run_migrations_online() -> None:
-    connectable = target_engine
+    connectable = get_engine()
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
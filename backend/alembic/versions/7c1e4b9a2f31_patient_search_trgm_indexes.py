@@ -0,0 +1,36 @@
+"""patient search trigram indexes
+
+Revision ID: 7c1e4b9a2f31
+Revises: dfda8e54d91d
+Create Date: 2026-10-18 10:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b9a2f31'
+down_revision: Union[str, None] = 'dfda8e54d91d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm GIN indexes serve the ILIKE prefix/substring and % similarity
+    # predicates used by GET /api/patients/search
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in ("first_name", "last_name", "email"):
+        op.create_index(
+            f"ix_users_{column}_trgm",
+            "users",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for column in ("first_name", "last_name", "email"):
+        op.drop_index(f"ix_users_{column}_trgm", table_name="users")
@@ -0,0 +1,29 @@
+"""profile row versions
+
+Revision ID: b84e1f07c3d2
+Revises: 3f9a6c2d8e15
+Create Date: 2026-10-18 17:41:09.284615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84e1f07c3d2'
+down_revision: Union[str, None] = '3f9a6c2d8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the server default fills existing rows without rewriting them (Postgres 11+)
+    op.add_column('patients', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('practitioners', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('practitioners', 'version')
+    op.drop_column('patients', 'version')
@@ -1,19 +1,72 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.config.base import settings
+from app.config.redis_config import close_redis_pool
+from app.middlewares.cache_middleware import CacheMiddleware
+from app.middlewares.rate_limiter_middleware import RateLimit, RateLimitMiddleware, RateLimitRule
 from app.routes.home.home import home_router
+from app.routes.auth import auth_router
+from app.routes.internal import internal_router
 from app.routes.users.users import users_router
 from app.routes.practitioners.practitioners import router as practitioners_router
 from app.routes.patients.patients import router as patients_router
+from app.routes.well_known import well_known_router
+from app.sessions.db import connect_engines, dispose_engines
+from app.utils.auth import password_pool
+from app.utils.token_revocation import revoked_access_tokens
+from app.wrappers.cache_keys import CachedEndpoint
+from app.wrappers.cache_tags import PATIENTS_LIST, PRACTITIONERS_LIST
+from app.wrappers.cache_wrappers import CacheUtils
+
+# listing and detail routes served through the response cache; they answer every caller
+# alike, so one entry per URL is shared by all users. Writes purge them by tag
+# (app.wrappers.cache_tags), which is what makes the long server-side lifetime safe.
+CACHED_ENDPOINTS = [
+    CachedEndpoint(r"/api/patients/?", per_user=False, tags=(PATIENTS_LIST,), max_age=settings.CACHE_TAGGED_MAX_AGE),
+    CachedEndpoint(r"/api/patients/(?P<patient_id>\d+)", per_user=False, tags=("patient:{patient_id}",), max_age=settings.CACHE_TAGGED_MAX_AGE),
+    CachedEndpoint(r"/api/practitioners/?", per_user=False, tags=(PRACTITIONERS_LIST,), max_age=settings.CACHE_TAGGED_MAX_AGE),
+    CachedEndpoint(r"/api/practitioners/(?!export$)(?P<practitioner_id>[^/]+)", per_user=False, tags=("practitioner:{practitioner_id}",), max_age=settings.CACHE_TAGGED_MAX_AGE),
+]
+
+# first match wins; the credential endpoints get a tight per-IP budget of their own
+RATE_LIMIT_RULES = [
+    RateLimitRule("auth", r"/api/(patients|practitioners)/(login|signup)|/api/patients/import|/api/auth/refresh", RateLimit.parse(settings.RATE_LIMIT_AUTH), methods=("POST",)),
+    RateLimitRule("default", r"/.*", RateLimit.parse(settings.RATE_LIMIT_DEFAULT), user_limit=RateLimit.parse(settings.RATE_LIMIT_USER)),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_CONNECT_ON_STARTUP:
+        await connect_engines(warm_up=settings.DB_POOL_WARM_UP)
+    revocation_sync = asyncio.create_task(revoked_access_tokens.run(settings.REVOCATION_SYNC_SECONDS))
+    cache_invalidations = asyncio.create_task(CacheUtils.listen())
+    yield
+    revocation_sync.cancel()
+    cache_invalidations.cancel()
+    password_pool.shutdown()
+    await dispose_engines()
+    await close_redis_pool()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="LungSense API")
-    app.include_router(home_router)
+    app = FastAPI(title="LungSense API", lifespan=lifespan)
     app.include_router(users_router)
+    app.include_router(auth_router)
     app.include_router(practitioners_router)
     app.include_router(patients_router)
+    app.include_router(internal_router)
+    app.include_router(well_known_router)
+    # home_router owns the catch-all GET route, so it must be registered last
+    app.include_router(home_router)
+    app.add_middleware(CacheMiddleware, cached_endpoints=CACHED_ENDPOINTS)
+    # added last so it runs first: throttled requests never reach the cache or the routes
+    app.add_middleware(RateLimitMiddleware, rules=RATE_LIMIT_RULES)
     return app
 
 
@@ -0,0 +1,99 @@
+"""Pick a password-hashing cost for this host.
+
+Hashes a sample password at increasing cost and reports the highest cost
+whose median latency stays within the target, together with the login
+throughput that leaves for the password process pool. Run it on the
+production hardware, with the API idle, and copy the printed settings into
+the environment; existing hashes are upgraded on each user's next login.
+
+    python -m app.cli.calibrate_password_hashing --target-ms 250
+    python -m app.cli.calibrate_password_hashing --scheme argon2 --memory-cost 65536 --target-ms 300
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from app.config.base import settings
+from app.utils.auth import PASSWORD_HASH_SCHEMES, build_password_context
+
+_SAMPLE_PASSWORD = "correct horse battery staple"
+BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS = 10, 20
+ARGON2_MAX_TIME_COST = 20
+
+
+def measure_ms(context, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(_SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(candidates, make_context, target_ms: float, samples: int) -> tuple[int, float, list[tuple[int, float]]]:
+    """Walk ``candidates`` in increasing cost; return (chosen cost, its latency, all measurements)."""
+    measured = []
+    for cost in candidates:
+        latency = measure_ms(make_context(cost), samples)
+        measured.append((cost, latency))
+        if latency > target_ms:
+            break
+    within = [(cost, latency) for cost, latency in measured if latency <= target_ms]
+    # nothing fits the budget: fall back to the cheapest cost we are willing to recommend
+    chosen, latency = within[-1] if within else measured[0]
+    return chosen, latency, measured
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=PASSWORD_HASH_SCHEMES, default=settings.PASSWORD_HASH_SCHEME)
+    parser.add_argument("--target-ms", type=float, default=250.0, help="latency budget for one hash")
+    parser.add_argument("--samples", type=int, default=5, help="hashes timed per cost")
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST, help="argon2 memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM, help="argon2 lanes")
+    args = parser.parse_args(argv)
+
+    if args.scheme == "bcrypt":
+        chosen, latency, measured = calibrate(
+            range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1),
+            lambda rounds: build_password_context("bcrypt", bcrypt_rounds=rounds),
+            args.target_ms,
+            args.samples,
+        )
+        label = "rounds"
+        env = {"PASSWORD_HASH_SCHEME": "bcrypt", "BCRYPT_ROUNDS": chosen}
+    else:
+        chosen, latency, measured = calibrate(
+            range(1, ARGON2_MAX_TIME_COST + 1),
+            lambda time_cost: build_password_context(
+                "argon2",
+                argon2_time_cost=time_cost,
+                argon2_memory_cost=args.memory_cost,
+                argon2_parallelism=args.parallelism,
+            ),
+            args.target_ms,
+            args.samples,
+        )
+        label = "time_cost"
+        env = {
+            "PASSWORD_HASH_SCHEME": "argon2",
+            "ARGON2_TIME_COST": chosen,
+            "ARGON2_MEMORY_COST": args.memory_cost,
+            "ARGON2_PARALLELISM": args.parallelism,
+        }
+
+    for cost, cost_latency in measured:
+        marker = "  <-" if cost == chosen else ""
+        print(f"{label} {cost:>3}   median {cost_latency:8.1f} ms{marker}")
+    if latency > args.target_ms:
+        print(f"warning: even the cheapest cost takes {latency:.1f} ms, above the {args.target_ms:.0f} ms target")
+    workers = settings.PASSWORD_HASH_WORKERS
+    print(f"\n~{workers * 1000 / latency:.0f} logins/s with PASSWORD_HASH_WORKERS={workers} (CPU-bound, all cores busy)\n")
+    for name, value in env.items():
+        print(f"{name}={value}")
+
+
+if __name__ == "__main__":
+    main()
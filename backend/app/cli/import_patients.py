@@ -0,0 +1,48 @@
+"""Bulk-import a patient roster file.
+
+    python -m app.cli.import_patients roster.csv
+    python -m app.cli.import_patients roster.ndjson --format ndjson
+
+CSV files need a header row with the PatientSignupRequest field names
+(email, password, first_name, last_name, country, province, ethnicity).
+Prints the import report as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+
+from app.sessions.db import AsyncSessionLocal, dispose_engines, get_async_engine
+from app.utils.roster_import import IMPORT_FORMATS, import_patients_async, iter_lines
+
+CHUNK_SIZE = 1 << 16
+
+
+async def _read_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+async def run(path: str, fmt: str) -> str:
+    get_async_engine()
+    try:
+        async with AsyncSessionLocal() as db:
+            report = await import_patients_async(db, iter_lines(_read_chunks(path)), fmt)
+    finally:
+        await dispose_engines()
+    return report.model_dump_json(indent=2)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults from the file extension")
+    args = parser.parse_args(argv)
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    print(asyncio.run(run(args.path, fmt)))
+
+
+if __name__ == "__main__":
+    main()
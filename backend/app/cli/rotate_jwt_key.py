@@ -0,0 +1,97 @@
+"""Add a new token signing key and retire old ones.
+
+Writes a fresh private key to ``<keys dir>/<kid>.pem`` with a timestamp kid.
+Every key in the directory verifies tokens and is published in the JWKS; only
+JWT_ACTIVE_KID signs (the newest kid when it is unset, which is only safe
+while there is a single key). Rotation is two deploys, so no token is ever signed
+with a key that some verifier hasn't loaded yet:
+
+1. With JWT_ACTIVE_KID pinned to the current key, add the new key and deploy
+   it everywhere. It is verify-only: API processes load it and the JWKS
+   publishes it, but the old key keeps signing.
+
+       python -m app.cli.rotate_jwt_key --keys-dir /etc/lungsense/jwt --algorithm EdDSA
+
+2. Once every API process runs with the new key and external verifiers have
+   refreshed their JWKS (it is cached for 5 minutes), set JWT_ACTIVE_KID to the
+   new kid and deploy again.
+
+Old keys keep verifying the tokens they signed. Once those tokens have expired,
+``--keep`` deletes all but the newest N keys; it never deletes the active one.
+
+    python -m app.cli.rotate_jwt_key --keys-dir /etc/lungsense/jwt --keep 1
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.config.base import settings
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def write_key(keys_dir: Path, algorithm: str) -> Path:
+    kid = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = keys_dir / f"{kid}.pem"
+    pem = generate_private_key(algorithm).private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    # created owner-only rather than chmod'ed afterwards, so the key is never world-readable
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(pem)
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys-dir", default=settings.JWT_KEYS_DIR, required=settings.JWT_KEYS_DIR is None)
+    parser.add_argument("--algorithm", choices=("RS256", "EdDSA"), default=settings.JWT_ALGORITHM if settings.JWT_ALGORITHM != "HS256" else "EdDSA")
+    parser.add_argument("--active-kid", default=settings.JWT_ACTIVE_KID, help="the kid the API signs with, as pinned by JWT_ACTIVE_KID (default: the environment's)")
+    parser.add_argument("--keep", type=int, help="instead of adding a key, delete all but the newest N keys")
+    args = parser.parse_args(argv)
+
+    if args.keep is not None and args.keep < 1:
+        parser.error("--keep must leave at least the active key")
+
+    keys_dir = Path(args.keys_dir)
+    existing = sorted(path.stem for path in keys_dir.glob("*.pem"))
+    if args.active_kid is not None and existing and args.active_kid not in existing:
+        parser.error(f"active kid {args.active_kid!r} is not among the keys {existing}")
+
+    if args.keep is not None:
+        retired = existing[: -args.keep]
+        if args.active_kid in retired:
+            parser.error(f"--keep {args.keep} would delete the active key {args.active_kid}; switch JWT_ACTIVE_KID first")
+        for kid in retired:
+            (keys_dir / f"{kid}.pem").unlink()
+            print(f"retired {kid}")
+        return
+
+    if existing and args.active_kid is None:
+        # unpinned, the API would start signing with the new key as soon as it restarts
+        parser.error(f"pin the current key first (JWT_ACTIVE_KID={existing[-1]}) so the new key is added verify-only")
+
+    keys_dir.mkdir(parents=True, exist_ok=True)
+    path = write_key(keys_dir, args.algorithm)
+    if existing:
+        print(f"added {args.algorithm} key {path.stem} at {path}, verify-only while {args.active_kid} signs")
+        print(f"deploy it everywhere, then set JWT_ACTIVE_KID={path.stem} in a later deploy")
+    else:
+        print(f"added {args.algorithm} key {path.stem} at {path}")
+
+
+if __name__ == "__main__":
+    main()
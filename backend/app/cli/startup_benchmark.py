@@ -0,0 +1,50 @@
+"""Measure cold-start cost of the API.
+
+Each run starts a fresh interpreter and reports how long ``import app.app``
+takes and how long it takes from process start until the first request
+(through the lifespan, including the DB check and pool warm-up) is answered.
+
+    python -m app.cli.startup_benchmark --runs 5
+    DB_CONNECT_ON_STARTUP=false python -m app.cli.startup_benchmark
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import app.app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.app.create_app()) as client:
+    status = client.get(%(path)r).status_code
+first_request = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_request_s": first_request - start, "status": status}))
+"""
+
+
+def run_once(path: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", _PROBE % {"path": path}], capture_output=True, text=True, check=True)
+    # the app may print to stdout on startup; the probe's report is always the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/", help="path requested as the first request")
+    args = parser.parse_args(argv)
+
+    samples = [run_once(args.path) for _ in range(args.runs)]
+    for key, label in (("import_s", "import app.app"), ("first_request_s", "time to first request")):
+        values = [sample[key] * 1000 for sample in samples]
+        print(f"{label:<24} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,5 +18,103 @@ class Settings:
 
     # Optional full DB URL override (no defaults)
     DATABASE_URL: str | None = os.environ.get("DATABASE_URL")
+    # Optional asyncpg URL override; derived from the sync URL when unset
+    ASYNC_DATABASE_URL: str | None = os.environ.get("ASYNC_DATABASE_URL")
+
+    # Connection pool, applied per engine in every worker process
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT: float = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Optional read replica; read-only routes and DAOs fall back to the primary when unset
+    READ_DATABASE_URL: str | None = os.environ.get("READ_DATABASE_URL")
+    ASYNC_READ_DATABASE_URL: str | None = os.environ.get("ASYNC_READ_DATABASE_URL")
+    # After a write, the same user's reads stay on the primary for this long (replica lag budget)
+    READ_YOUR_WRITES_SECONDS: float = float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+
+    # Startup: check connectivity in the app lifespan and pre-open this many pooled connections
+    DB_CONNECT_ON_STARTUP: bool = os.environ.get("DB_CONNECT_ON_STARTUP", "true").lower() == "true"
+    DB_POOL_WARM_UP: int = int(os.environ.get("DB_POOL_WARM_UP", 0))
+
+    # Password hashing process pool; beyond MAX_PENDING queued + running jobs, logins/signups get 503
+    PASSWORD_HASH_WORKERS: int = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 8 * (os.cpu_count() or 1)))
+
+    # Password hashing cost; tune with `python -m app.cli.calibrate_password_hashing`.
+    # Hashes made with another scheme or a lower cost are upgraded on the next successful login.
+    PASSWORD_HASH_SCHEME: str = os.environ.get("PASSWORD_HASH_SCHEME", "bcrypt")  # bcrypt | argon2
+    BCRYPT_ROUNDS: int = int(os.environ.get("BCRYPT_ROUNDS", 12))
+    ARGON2_TIME_COST: int = int(os.environ.get("ARGON2_TIME_COST", 3))
+    ARGON2_MEMORY_COST: int = int(os.environ.get("ARGON2_MEMORY_COST", 65536))  # KiB
+    ARGON2_PARALLELISM: int = int(os.environ.get("ARGON2_PARALLELISM", 4))
+
+    # Token signing: HS256 with SECRET_KEY, or RS256/EdDSA with the private keys in JWT_KEYS_DIR
+    # (one <kid>.pem each, see app.cli.rotate_jwt_key); JWT_ACTIVE_KID signs, default the last kid by name,
+    # and must be pinned before a rotation adds the next key
+    JWT_ALGORITHM: str = os.environ.get("JWT_ALGORITHM", "HS256")
+    JWT_KEYS_DIR: str | None = os.environ.get("JWT_KEYS_DIR")
+    JWT_ACTIVE_KID: str | None = os.environ.get("JWT_ACTIVE_KID")
+
+    # Access tokens are short-lived and renewed with rotating refresh tokens (POST /api/auth/refresh);
+    # verified claims are cached per token for at most JWT_CLAIMS_CACHE_TTL seconds
+    ACCESS_TOKEN_TTL_MINUTES: int = int(os.environ.get("ACCESS_TOKEN_TTL_MINUTES", 15))
+    REFRESH_TOKEN_TTL_DAYS: int = int(os.environ.get("REFRESH_TOKEN_TTL_DAYS", 30))
+    JWT_CLAIMS_CACHE_SIZE: int = int(os.environ.get("JWT_CLAIMS_CACHE_SIZE", 10_000))
+    JWT_CLAIMS_CACHE_TTL: int = int(os.environ.get("JWT_CLAIMS_CACHE_TTL", 300))
+
+    # Auth state (role, is_active, is_deleted) of token holders is cached per process for this many
+    # seconds; soft deletes invalidate it locally, other processes catch up within the TTL (0 disables)
+    USER_STATE_CACHE_TTL: float = float(os.environ.get("USER_STATE_CACHE_TTL", 5))
+    USER_STATE_CACHE_SIZE: int = int(os.environ.get("USER_STATE_CACHE_SIZE", 10_000))
+
+    # Revoked access tokens are held in a Bloom filter rebuilt from the DB every SYNC_SECONDS;
+    # CAPACITY and FP_RATE size it (hits are confirmed against the DB, so FP_RATE only costs lookups)
+    REVOCATION_SYNC_SECONDS: int = int(os.environ.get("REVOCATION_SYNC_SECONDS", 30))
+    REVOCATION_FILTER_CAPACITY: int = int(os.environ.get("REVOCATION_FILTER_CAPACITY", 100_000))
+    REVOCATION_FILTER_FP_RATE: float = float(os.environ.get("REVOCATION_FILTER_FP_RATE", 0.0001))
+
+    # Login throttling: after THRESHOLD failures an email (or IP) is locked out for BASE_DELAY
+    # seconds, doubling per further failure up to MAX_DELAY; counters are forgotten after WINDOW quiet seconds
+    LOGIN_THROTTLE_EMAIL_THRESHOLD: int = int(os.environ.get("LOGIN_THROTTLE_EMAIL_THRESHOLD", 5))
+    LOGIN_THROTTLE_IP_THRESHOLD: int = int(os.environ.get("LOGIN_THROTTLE_IP_THRESHOLD", 50))
+    LOGIN_THROTTLE_BASE_DELAY: int = int(os.environ.get("LOGIN_THROTTLE_BASE_DELAY", 1))
+    LOGIN_THROTTLE_MAX_DELAY: int = int(os.environ.get("LOGIN_THROTTLE_MAX_DELAY", 900))
+    LOGIN_THROTTLE_WINDOW: int = int(os.environ.get("LOGIN_THROTTLE_WINDOW", 900))
+    LOGIN_THROTTLE_MAX_KEYS: int = int(os.environ.get("LOGIN_THROTTLE_MAX_KEYS", 100_000))
+
+    # Response cache for the listing/detail GET routes: "memory" (per-process LRU capped at
+    # CACHE_MAX_BYTES) or "redis" (shared, needs REDIS_URL); entries live CACHE_MAX_AGE seconds
+    CACHE_BACKEND: str = os.environ.get("CACHE_BACKEND", "memory")
+    CACHE_MAX_AGE: int = int(os.environ.get("CACHE_MAX_AGE", 60))
+    CACHE_MAX_BYTES: int = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    CACHE_MAX_BODY_BYTES: int = int(os.environ.get("CACHE_MAX_BODY_BYTES", 1024 * 1024))  # larger responses pass through uncached
+    CACHE_MAX_TAGS: int = int(os.environ.get("CACHE_MAX_TAGS", 100_000))  # tag versions kept by the memory backend
+    # With redis, each process keeps a CACHE_L1_MAX_BYTES LRU in front of it (0 disables); purges reach the other
+    # processes over Redis pub/sub, or over Postgres LISTEN/NOTIFY for the memory backend on Postgres
+    CACHE_L1_MAX_BYTES: int = int(os.environ.get("CACHE_L1_MAX_BYTES", 16 * 1024 * 1024))
+    # Expired entries are still served for CACHE_STALE_SECONDS while one request refreshes them (0 disables);
+    # concurrent misses wait up to CACHE_LOCK_SECONDS for the request computing the entry
+    CACHE_STALE_SECONDS: int = int(os.environ.get("CACHE_STALE_SECONDS", 30))
+    CACHE_LOCK_SECONDS: float = float(os.environ.get("CACHE_LOCK_SECONDS", 5))
+    # Routes whose entries are purged by tag when the rows behind them change keep them this long on the
+    # server; clients are still told CACHE_MAX_AGE, since their copies can't be purged
+    CACHE_TAGGED_MAX_AGE: int = int(os.environ.get("CACHE_TAGGED_MAX_AGE", 6 * 3600))
+
+    # Request rate limits as "count/seconds" (GCRA: bursts up to count, then count per period), keyed per
+    # client IP for anonymous callers and per user for authenticated ones; AUTH covers login/signup/refresh
+    RATE_LIMIT_DEFAULT: str = os.environ.get("RATE_LIMIT_DEFAULT", "300/60")
+    RATE_LIMIT_USER: str = os.environ.get("RATE_LIMIT_USER", "600/60")
+    RATE_LIMIT_AUTH: str = os.environ.get("RATE_LIMIT_AUTH", "30/60")
+    RATE_LIMIT_MAX_KEYS: int = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100_000))  # in-process fallback state
+
+    # Redis, shared by the API processes; features that use it fall back to in-process state when unset
+    REDIS_URL: str | None = os.environ.get("REDIS_URL")
+
+    # Bulk roster import: rows per INSERT batch; passwords are hashed in the password pool above
+    IMPORT_BATCH_SIZE: int = int(os.environ.get("IMPORT_BATCH_SIZE", 1000))
+
+    # Shared secret (X-Internal-Token header) for the /internal endpoints; they answer 404 when unset
+    INTERNAL_API_TOKEN: str | None = os.environ.get("INTERNAL_API_TOKEN")
 
 settings = Settings()
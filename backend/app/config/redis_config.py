@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional; callers fall back to in-process state
+    aioredis = None
+
+from app.config.base import settings
+
+# what callers catch to degrade to their in-process fallback when Redis misbehaves
+REDIS_ERRORS: tuple[type[BaseException], ...] = (aioredis.RedisError, OSError) if aioredis else (OSError,)
+
+_pool = None
+
+
+async def get_redis_pool():
+    """Return a client on the process-wide connection pool, or None when Redis is not configured."""
+    global _pool
+    if not settings.REDIS_URL or aioredis is None:
+        return None
+    if _pool is None:
+        # short timeouts: Redis backs caches and counters, and callers would rather fall back than wait
+        _pool = aioredis.ConnectionPool.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1, socket_timeout=1)
+    return aioredis.Redis(connection_pool=_pool)
+
+
+def create_redis_client():
+    """A client with connections of its own, for code running outside the app's event loop; the caller closes it.
+
+    The process-wide pool's connections belong to the loop that opened them.
+    """
+    if not settings.REDIS_URL or aioredis is None:
+        return None
+    return aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1, socket_timeout=1)
+
+
+async def close_redis_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.disconnect()
+        _pool = None
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import jwt
+from fastapi import HTTPException
+
+from app.config.base import settings
+
+# allow SECRET_KEY from settings or env var; fall back to a development default
+SECRET_KEY = getattr(settings, "SECRET_KEY", None) or os.environ.get("SECRET_KEY", "devsecret")
+SIGNING_ALGORITHMS = ("HS256", "RS256", "EdDSA")
+ALGORITHM = settings.JWT_ALGORITHM
+if ALGORITHM not in SIGNING_ALGORITHMS:
+    raise ValueError(f"JWT_ALGORITHM must be one of {SIGNING_ALGORITHMS}, got {ALGORITHM!r}")
+
+
+class KeyRing:
+    """Asymmetric signing keys by ``kid``: the active key signs, every key verifies and is published.
+
+    Rotating means adding a new key and making it active while the previous ones
+    stay in the ring until the tokens they signed have expired.
+    """
+
+    def __init__(self, algorithm: str, private_keys: dict, active_kid: str) -> None:
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+        from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+        key_type, to_jwk = {"RS256": (rsa.RSAPrivateKey, RSAAlgorithm), "EdDSA": (ed25519.Ed25519PrivateKey, OKPAlgorithm)}[algorithm]
+        for kid, key in private_keys.items():
+            if not isinstance(key, key_type):
+                raise ValueError(f"signing key {kid!r} is not a {key_type.__name__} as {algorithm} requires")
+        if active_kid not in private_keys:
+            raise ValueError(f"active kid {active_kid!r} is not among the signing keys {sorted(private_keys)}")
+
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self.signing_key = private_keys[active_kid]
+        self.public_keys = {kid: key.public_key() for kid, key in private_keys.items()}
+        self.jwks = {
+            "keys": [
+                {**to_jwk.to_jwk(public_key, as_dict=True), "kid": kid, "alg": algorithm, "use": "sig"}
+                for kid, public_key in self.public_keys.items()
+            ]
+        }
+
+    @classmethod
+    def from_directory(cls, algorithm: str, directory: str, active_kid: str | None = None) -> "KeyRing":
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+        paths = sorted(Path(directory).glob("*.pem"))
+        if not paths:
+            raise ValueError(f"no *.pem signing keys in {directory}")
+        private_keys = {path.stem: load_pem_private_key(path.read_bytes(), password=None) for path in paths}
+        return cls(algorithm, private_keys, active_kid or paths[-1].stem)
+
+
+_key_ring: KeyRing | None = None
+_key_ring_lock = threading.Lock()
+
+
+def get_key_ring() -> KeyRing:
+    global _key_ring
+    if _key_ring is None:
+        with _key_ring_lock:
+            if _key_ring is None:
+                if not settings.JWT_KEYS_DIR:
+                    raise ValueError(f"JWT_ALGORITHM={ALGORITHM} needs JWT_KEYS_DIR")
+                _key_ring = KeyRing.from_directory(ALGORITHM, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+    return _key_ring
+
+
+def jwks() -> dict:
+    """Public keys for ``/.well-known/jwks.json``; empty while tokens are signed with the shared secret."""
+    return {"keys": []} if ALGORITHM == "HS256" else get_key_ring().jwks
+
+
+class VerifiedClaimsCache:
+    """Bounded LRU of token -> claims for tokens whose signature and expiry were already checked.
+
+    An entry lives until the token's own ``exp`` or ``ttl`` seconds after it was
+    verified, whichever comes first, so a hit never outlives the token.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> dict | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            with self._lock:
+                self._entries.pop(token, None)
+            return None
+        return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        expires_at = time.time() + self.ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_claims = VerifiedClaimsCache(settings.JWT_CLAIMS_CACHE_SIZE, settings.JWT_CLAIMS_CACHE_TTL)
+
+
+def new_jti() -> str:
+    return uuid.uuid4().hex
+
+
+def _encode(payload: dict) -> str:
+    if ALGORITHM == "HS256":
+        return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    key_ring = get_key_ring()
+    return jwt.encode(payload, key_ring.signing_key, algorithm=ALGORITHM, headers={"kid": key_ring.active_kid})
+
+
+def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+    expires = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_TTL_MINUTES))
+    # the jti is what logout revokes
+    return _encode({"sub": subject, "exp": expires, "jti": new_jti(), "type": "access"})
+
+
+def create_refresh_token(subject: str, jti: str, family_id: str, expires: datetime) -> str:
+    return _encode({"sub": subject, "exp": expires, "jti": jti, "fam": family_id, "type": "refresh"})
+
+
+def _decode(token: str) -> dict:
+    if ALGORITHM == "HS256":
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    kid = jwt.get_unverified_header(token).get("kid")
+    public_key = get_key_ring().public_keys.get(kid)
+    if public_key is None:
+        raise jwt.InvalidTokenError(f"unknown signing key {kid!r}")
+    return jwt.decode(token, public_key, algorithms=[ALGORITHM])
+
+
+def verify_token(token: str) -> dict:
+    """Return the token's claims, raising ``jwt.InvalidTokenError`` if it is bad or expired."""
+    claims = verified_claims.get(token)
+    if claims is None:
+        claims = _decode(token)
+        verified_claims.put(token, claims)
+    # callers get their own copy so nobody can edit what the next request sees
+    return dict(claims)
+
+
+def _decode_typed(token: str, token_type: str, decode=verify_token) -> dict:
+    try:
+        claims = decode(token)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    # tokens issued before refresh tokens existed carry no type and are access tokens
+    if claims.get("type", "access") != token_type:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return claims
+
+
+def decode_access_token(token: str) -> dict:
+    return _decode_typed(token, "access")
+
+
+def decode_refresh_token(token: str) -> dict:
+    # refresh tokens are single-use, so they skip the verified-claims cache
+    return _decode_typed(token, "refresh", decode=_decode)
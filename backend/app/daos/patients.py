@@ -1,25 +1,23 @@
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, case, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.patients import PatientProfile
-from app.daos.users import create_user
+from app.models.users import User
+from app.daos.users import bulk_create_users_with_profiles_async, create_user_with_profile, create_user_with_profile_async
+from app.daos.tokens import revoke_user_refresh_tokens, revoke_user_refresh_tokens_async
+from app.sessions.routing import replica_reads
+from app.utils.identity_cache import user_states
+from app.utils.auth import hash_password, hash_password_async
+from app.wrappers.cache_tags import patient_tags, tag_cache
 
 
 def create_patient(db: Session, *, email: str, password: str, first_name: str | None = None, last_name: str | None = None, country: str | None = None, province: str | None = None, ethnicity: str | None = None) -> PatientProfile:
-    # create user with role 'patient'
-    user = create_user(db, email=email, password=password, role="patient", first_name=first_name, last_name=last_name)
-
-    profile = PatientProfile(user_id=user.id, country=country, province=province, ethnicity=ethnicity)
-    db.add(profile)
-    try:
-        db.commit()
-        db.refresh(profile)
-    except IntegrityError:
-        db.rollback()
-        raise
-    return profile
+    # user and profile are written in one transaction (one statement on Postgres)
+    user_values = dict(email=email, hashed_password=hash_password(password), role="patient", first_name=first_name, last_name=last_name)
+    return create_user_with_profile(db, user_values=user_values, profile_model=PatientProfile, profile_values=dict(country=country, province=province, ethnicity=ethnicity))
 
 
 def get_patient_by_user(db: Session, user_id: int) -> PatientProfile | None:
@@ -30,15 +28,94 @@ def get_patient_by_id(db: Session, patient_id: int) -> PatientProfile | None:
     return db.query(PatientProfile).get(patient_id)
 
 
-def list_patients(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(PatientProfile).offset(skip).limit(limit).all()
+# flat projection for listings: one joined query, no ORM identity map or lazy ``user`` loads per row
+_PATIENT_LIST_COLUMNS = (
+    PatientProfile.id,
+    PatientProfile.user_id,
+    User.email,
+    User.first_name,
+    User.last_name,
+    PatientProfile.country,
+    PatientProfile.province,
+    PatientProfile.ethnicity,
+)
+
+
+def _list_patients_stmt(skip: int, limit: int | None, after_id: int | None):
+    # keyset on the primary key; ``skip`` is only kept for old offset-based callers. Soft-deleted users are
+    # left out here, not in the routes, so a purged cache entry can't be refilled with them
+    stmt = (
+        select(*_PATIENT_LIST_COLUMNS)
+        .join(User, User.id == PatientProfile.user_id)
+        .where(User.is_deleted == False)
+        .order_by(PatientProfile.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        stmt = stmt.where(PatientProfile.id > after_id)
+    if skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+def _like_escape(term: str) -> str:
+    # "/" rather than a backslash: Postgres and SQLite quote backslashes in literals differently
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+# the ranks ``_search_patients_stmt`` assigns, which are all a search cursor may hold
+SEARCH_RANKS = range(4)
+
+
+def _search_patients_stmt(dialect_name: str, query: str, limit: int, after: dict | None):
+    """Ranked name/email search over patients, keyset-paginated on (rank, id).
+
+    rank 0: exact email, 1: every word is a prefix of first name, last name or
+    email (typeahead), 2: every word occurs somewhere in them, 3: trigram
+    similarity (Postgres only, tolerates typos). The ILIKE and ``%`` predicates
+    are served by the pg_trgm GIN indexes on users; SQLite falls back to a scan.
+    """
+    fields = (User.first_name, User.last_name, User.email)
+    words = [_like_escape(word) for word in query.lower().split()]
+    prefix = and_(*[or_(*[field.ilike(f"{word}%", escape="/") for field in fields]) for word in words])
+    contains = and_(*[or_(*[field.ilike(f"%{word}%", escape="/") for field in fields]) for word in words])
+    matches = [contains]
+    if dialect_name == "postgresql":
+        matches.append(or_(*[field.op("%")(query) for field in fields]))
+
+    rank = case(
+        (User.email.ilike(_like_escape(query.strip()), escape="/"), 0),
+        (prefix, 1),
+        (contains, 2),
+        else_=3,
+    ).label("rank")
+    stmt = (
+        select(*_PATIENT_LIST_COLUMNS, rank)
+        .join(User, User.id == PatientProfile.user_id)
+        .where(User.is_deleted == False, or_(*matches))
+        .order_by(rank, PatientProfile.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(or_(rank > after["rank"], and_(rank == after["rank"], PatientProfile.id > after["id"])))
+    return stmt
+
+
+def list_patients(db: Session, skip: int = 0, limit: int = 100, after_id: int | None = None):
+    return db.execute(_list_patients_stmt(skip, limit, after_id)).all()
 
 
 def soft_delete_patient(db: Session, patient_id: int):
     profile = db.query(PatientProfile).get(patient_id)
     if profile:
+        user_id = profile.user_id
         profile.user.is_deleted = True
+        # a deleted user must not be able to mint new access tokens
+        revoke_user_refresh_tokens(db, user_id)
+        # only the users row changes, which doesn't say which cached profile it backs
+        tag_cache(db, *patient_tags(profile.id))
         db.commit()
+        user_states.invalidate(user_id)
         return True
     return False
 
@@ -46,8 +123,87 @@ def soft_delete_patient(db: Session, patient_id: int):
 def hard_delete_patient(db: Session, patient_id: int):
     profile = db.query(PatientProfile).get(patient_id)
     if profile:
+        user_id = profile.user_id
         db.delete(profile)
         db.delete(profile.user)
         db.commit()
+        user_states.invalidate(user_id)
         return True
     return False
+
+
+async def create_patient_async(db: AsyncSession, *, email: str, password: str, first_name: str | None = None, last_name: str | None = None, country: str | None = None, province: str | None = None, ethnicity: str | None = None) -> PatientProfile:
+    hashed = await hash_password_async(password)
+    user_values = dict(email=email, hashed_password=hashed, role="patient", first_name=first_name, last_name=last_name)
+    return await create_user_with_profile_async(db, user_values=user_values, profile_model=PatientProfile, profile_values=dict(country=country, province=province, ethnicity=ethnicity))
+
+
+async def bulk_create_patients_async(db: AsyncSession, rows: list[tuple[dict, dict]]) -> dict[str, int]:
+    """Insert a batch of ``(user_values, profile_values)`` pairs whose passwords are already hashed."""
+    users = [(dict(user, role="patient"), profile) for user, profile in rows]
+    return await bulk_create_users_with_profiles_async(db, rows=users, profile_model=PatientProfile)
+
+
+@replica_reads
+async def get_patient_by_user_async(db: AsyncSession, user_id: int) -> PatientProfile | None:
+    result = await db.execute(select(PatientProfile).where(PatientProfile.user_id == user_id))
+    return result.scalars().first()
+
+
+@replica_reads
+async def get_patient_by_id_async(db: AsyncSession, patient_id: int) -> PatientProfile | None:
+    """The profile, or None when there is none or its user is soft-deleted."""
+    stmt = select(PatientProfile).join(User, User.id == PatientProfile.user_id).where(PatientProfile.id == patient_id, User.is_deleted == False)
+    return (await db.execute(stmt)).scalars().first()
+
+
+@replica_reads
+async def get_patient_version_async(db: AsyncSession, patient_id: int) -> int | None:
+    """Just the row version, for answering If-None-Match without loading the profile."""
+    stmt = select(PatientProfile.version).join(User, User.id == PatientProfile.user_id).where(PatientProfile.id == patient_id, User.is_deleted == False)
+    return (await db.execute(stmt)).scalar()
+
+
+async def stream_patients_async(db: AsyncSession, batch_size: int = 1000):
+    """Yield every patient whose user isn't soft-deleted, in id order, ``batch_size`` rows at a time, from a server-side cursor."""
+    stmt = _list_patients_stmt(skip=0, limit=None, after_id=None).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+@replica_reads
+async def list_patients_async(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: int | None = None):
+    result = await db.execute(_list_patients_stmt(skip, limit, after_id))
+    return result.all()
+
+
+async def soft_delete_patient_async(db: AsyncSession, patient_id: int):
+    # the user relationship can't lazy-load under asyncio, so fetch it with the profile
+    profile = await db.get(PatientProfile, patient_id, options=[selectinload(PatientProfile.user)])
+    if profile:
+        profile.user.is_deleted = True
+        await revoke_user_refresh_tokens_async(db, profile.user_id)
+        tag_cache(db, *patient_tags(profile.id))
+        await db.commit()
+        user_states.invalidate(profile.user_id)
+        return True
+    return False
+
+
+async def hard_delete_patient_async(db: AsyncSession, patient_id: int):
+    profile = await db.get(PatientProfile, patient_id, options=[selectinload(PatientProfile.user)])
+    if profile:
+        await db.delete(profile)
+        await db.delete(profile.user)
+        await db.commit()
+        user_states.invalidate(profile.user_id)
+        return True
+    return False
+
+
+@replica_reads
+async def search_patients_async(db: AsyncSession, query: str, limit: int = 20, after: dict | None = None):
+    stmt = _search_patients_stmt(db.get_bind().dialect.name, query, limit, after)
+    result = await db.execute(stmt)
+    return result.all()
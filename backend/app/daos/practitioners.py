@@ -1,25 +1,23 @@
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.practitioners import PractitionerProfile
-from app.daos.users import create_user, get_user_by_email
+from app.models.users import User
+from app.daos.users import create_user_with_profile, create_user_with_profile_async, get_user_by_email
+from app.daos.tokens import revoke_user_refresh_tokens, revoke_user_refresh_tokens_async
+from app.sessions.routing import replica_reads
+from app.utils.identity_cache import user_states
+from app.utils.auth import hash_password, hash_password_async
+from app.wrappers.cache_tags import practitioner_tags, tag_cache
 
 
 def create_practitioner(db: Session, *, email: str, password: str, practitioner_id: str, first_name: str | None = None, last_name: str | None = None, institution: str | None = None, institution_location: str | None = None) -> PractitionerProfile:
-    # create user with role 'practitioner'
-    user = create_user(db, email=email, password=password, role="practitioner", first_name=first_name, last_name=last_name)
-
-    profile = PractitionerProfile(user_id=user.id, practitioner_id=practitioner_id, institution=institution, institution_location=institution_location)
-    db.add(profile)
-    try:
-        db.commit()
-        db.refresh(profile)
-    except IntegrityError:
-        db.rollback()
-        raise
-    return profile
+    # user and profile are written in one transaction (one statement on Postgres)
+    user_values = dict(email=email, hashed_password=hash_password(password), role="practitioner", first_name=first_name, last_name=last_name)
+    return create_user_with_profile(db, user_values=user_values, profile_model=PractitionerProfile, profile_values=dict(practitioner_id=practitioner_id, institution=institution, institution_location=institution_location))
 
 
 def get_practitioner_by_user(db: Session, user_id: int) -> PractitionerProfile | None:
@@ -30,16 +28,52 @@ def get_practitioner_by_id(db: Session, practitioner_id: str) -> PractitionerPro
     return db.query(PractitionerProfile).filter(PractitionerProfile.practitioner_id == practitioner_id).first()
 
 
-def list_practitioners(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(PractitionerProfile).offset(skip).limit(limit).all()
+# flat projection for listings: one joined query, no ORM identity map or lazy ``user`` loads per row
+_PRACTITIONER_LIST_COLUMNS = (
+    PractitionerProfile.id,
+    PractitionerProfile.user_id,
+    User.email,
+    User.first_name,
+    User.last_name,
+    PractitionerProfile.practitioner_id,
+    PractitionerProfile.institution,
+    PractitionerProfile.institution_location,
+)
+
+
+def _list_practitioners_stmt(skip: int, limit: int | None, after_id: int | None):
+    # keyset on the primary key; ``skip`` is only kept for old offset-based callers. Soft-deleted users are
+    # left out here, not in the routes, so a purged cache entry can't be refilled with them
+    stmt = (
+        select(*_PRACTITIONER_LIST_COLUMNS)
+        .join(User, User.id == PractitionerProfile.user_id)
+        .where(User.is_deleted == False)
+        .order_by(PractitionerProfile.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        stmt = stmt.where(PractitionerProfile.id > after_id)
+    if skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+def list_practitioners(db: Session, skip: int = 0, limit: int = 100, after_id: int | None = None):
+    return db.execute(_list_practitioners_stmt(skip, limit, after_id)).all()
 
 
 def soft_delete_practitioner(db: Session, practitioner_id: int):
     profile = db.query(PractitionerProfile).get(practitioner_id)
     if profile:
         # mark underlying user as deleted
+        user_id = profile.user_id
         profile.user.is_deleted = True
+        # a deleted user must not be able to mint new access tokens
+        revoke_user_refresh_tokens(db, user_id)
+        # only the users row changes, which doesn't say which cached profile it backs
+        tag_cache(db, *practitioner_tags(profile.practitioner_id))
         db.commit()
+        user_states.invalidate(user_id)
         return True
     return False
 
@@ -47,8 +81,82 @@ def soft_delete_practitioner(db: Session, practitioner_id: int):
 def hard_delete_practitioner(db: Session, practitioner_id: int):
     profile = db.query(PractitionerProfile).get(practitioner_id)
     if profile:
+        user_id = profile.user_id
         db.delete(profile)
         db.delete(profile.user)
         db.commit()
+        user_states.invalidate(user_id)
+        return True
+    return False
+
+
+async def create_practitioner_async(db: AsyncSession, *, email: str, password: str, practitioner_id: str, first_name: str | None = None, last_name: str | None = None, institution: str | None = None, institution_location: str | None = None) -> PractitionerProfile:
+    hashed = await hash_password_async(password)
+    user_values = dict(email=email, hashed_password=hashed, role="practitioner", first_name=first_name, last_name=last_name)
+    return await create_user_with_profile_async(db, user_values=user_values, profile_model=PractitionerProfile, profile_values=dict(practitioner_id=practitioner_id, institution=institution, institution_location=institution_location))
+
+
+@replica_reads
+async def get_practitioner_by_user_async(db: AsyncSession, user_id: int) -> PractitionerProfile | None:
+    result = await db.execute(select(PractitionerProfile).where(PractitionerProfile.user_id == user_id))
+    return result.scalars().first()
+
+
+@replica_reads
+async def get_practitioner_by_id_async(db: AsyncSession, practitioner_id: str) -> PractitionerProfile | None:
+    """The profile, or None when there is none or its user is soft-deleted."""
+    result = await db.execute(
+        select(PractitionerProfile)
+        .join(User, User.id == PractitionerProfile.user_id)
+        .where(PractitionerProfile.practitioner_id == practitioner_id, User.is_deleted == False)
+    )
+    return result.scalars().first()
+
+
+@replica_reads
+async def get_practitioner_version_async(db: AsyncSession, practitioner_id: str):
+    """(id, version) of the profile, for answering If-None-Match without loading it."""
+    result = await db.execute(
+        select(PractitionerProfile.id, PractitionerProfile.version)
+        .join(User, User.id == PractitionerProfile.user_id)
+        .where(PractitionerProfile.practitioner_id == practitioner_id, User.is_deleted == False)
+    )
+    return result.first()
+
+
+async def stream_practitioners_async(db: AsyncSession, batch_size: int = 1000):
+    """Yield every practitioner whose user isn't soft-deleted, in id order, ``batch_size`` rows at a time, from a server-side cursor."""
+    stmt = _list_practitioners_stmt(skip=0, limit=None, after_id=None).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+@replica_reads
+async def list_practitioners_async(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: int | None = None):
+    result = await db.execute(_list_practitioners_stmt(skip, limit, after_id))
+    return result.all()
+
+
+async def soft_delete_practitioner_async(db: AsyncSession, practitioner_id: int):
+    # the user relationship can't lazy-load under asyncio, so fetch it with the profile
+    profile = await db.get(PractitionerProfile, practitioner_id, options=[selectinload(PractitionerProfile.user)])
+    if profile:
+        profile.user.is_deleted = True
+        await revoke_user_refresh_tokens_async(db, profile.user_id)
+        tag_cache(db, *practitioner_tags(profile.practitioner_id))
+        await db.commit()
+        user_states.invalidate(profile.user_id)
+        return True
+    return False
+
+
+async def hard_delete_practitioner_async(db: AsyncSession, practitioner_id: int):
+    profile = await db.get(PractitionerProfile, practitioner_id, options=[selectinload(PractitionerProfile.user)])
+    if profile:
+        await db.delete(profile)
+        await db.delete(profile.user)
+        await db.commit()
+        user_states.invalidate(profile.user_id)
         return True
     return False
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.tokens import RefreshToken, RevokedToken
+
+
+async def add_refresh_token_async(db: AsyncSession, *, jti: str, user_id: int, family_id: str, expires_at: datetime) -> None:
+    db.add(RefreshToken(jti=jti, user_id=user_id, family_id=family_id, expires_at=expires_at))
+    await db.commit()
+
+
+async def rotate_refresh_token_async(db: AsyncSession, *, jti: str, new_jti: str, user_id: int, family_id: str, expires_at: datetime) -> bool:
+    """Swap ``jti`` for ``new_jti`` in one primary-key UPDATE plus an INSERT.
+
+    The UPDATE only matches a live token, so of two concurrent refreshes with the
+    same token exactly one wins. A token that is already spent (or unknown) means
+    it was stolen or replayed: the whole family is revoked and False returned.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti, RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now)
+        .values(revoked_at=now, replaced_by=new_jti)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        await revoke_refresh_family_async(db, family_id)
+        return False
+    db.add(RefreshToken(jti=new_jti, user_id=user_id, family_id=family_id, expires_at=expires_at))
+    await db.commit()
+    return True
+
+
+async def revoke_refresh_family_async(db: AsyncSession, family_id: str) -> None:
+    await db.execute(update(RefreshToken).where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None)).values(revoked_at=datetime.utcnow()))
+    await db.commit()
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> None:
+    # no commit: runs inside the caller's transaction (e.g. a soft delete)
+    db.execute(update(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None)).values(revoked_at=datetime.utcnow()))
+
+
+async def revoke_user_refresh_tokens_async(db: AsyncSession, user_id: int) -> None:
+    await db.execute(update(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None)).values(revoked_at=datetime.utcnow()))
+
+
+async def revoke_access_token_async(db: AsyncSession, *, jti: str, expires_at: datetime) -> None:
+    if await db.get(RevokedToken, jti) is None:
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        await db.commit()
+
+
+async def is_access_token_revoked_async(db: AsyncSession, jti: str) -> bool:
+    return await db.get(RevokedToken, jti) is not None
+
+
+async def list_revoked_access_jtis_async(db: AsyncSession) -> list[str]:
+    result = await db.execute(select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.utcnow()))
+    return list(result.scalars())
+
+
+async def purge_expired_tokens_async(db: AsyncSession) -> None:
+    now = datetime.utcnow()
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    await db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now))
+    await db.commit()
@@ -1,33 +1,179 @@
 from __future__ import annotations
 
+from sqlalchemy import insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+from app.exceptions import UserAlreadyExistsException
 from app.models.users import User
-from app.utils.auth import hash_password, verify_password
+from app.utils.auth import hash_password, hash_password_async, verify_and_update_password, verify_and_update_password_async
+
+
+def _dialect_name(db: Session | AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def _insert_user_stmt(dialect_name: str, user_values: dict | None = None):
+    # a duplicate email inserts nothing and returns no row instead of raising;
+    # without ``user_values`` the statement is meant for executemany parameters
+    insert_fn = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert_fn(User)
+    if user_values is not None:
+        stmt = stmt.values(**user_values)
+    return stmt.on_conflict_do_nothing(index_elements=[User.email])
+
+
+def _insert_profile_stmt(profile_model, user_id: int, profile_values: dict):
+    return insert(profile_model).values(user_id=user_id, **profile_values).returning(profile_model)
+
+
+def _signup_stmt(user_values: dict, profile_model, profile_values: dict):
+    """Postgres only: create the user and its profile in one INSERT ... RETURNING round trip.
+
+    WITH new_user AS (INSERT INTO users ... ON CONFLICT DO NOTHING RETURNING id)
+    INSERT INTO <profiles> (user_id, ...) SELECT id, ... FROM new_user RETURNING <profiles>.*
+    """
+    new_user = _insert_user_stmt("postgresql", user_values).returning(User.id).cte("new_user")
+    columns = profile_model.__table__.c
+    values = [literal(value, type_=columns[name].type) for name, value in profile_values.items()]
+    return (
+        insert(profile_model)
+        .from_select(["user_id", *profile_values], select(new_user.c.id, *values))
+        .add_cte(new_user)
+        .returning(profile_model)
+    )
 
 
 def create_user(db: Session, *, email: str, password: str, role: str = "patient", first_name: str | None = None, last_name: str | None = None) -> User:
     hashed = hash_password(password)
-    user = User(email=email, hashed_password=hashed, first_name=first_name, last_name=last_name, role=role)
-    db.add(user)
+    stmt = _insert_user_stmt(_dialect_name(db), dict(email=email, hashed_password=hashed, first_name=first_name, last_name=last_name, role=role))
     try:
+        user = db.execute(stmt.returning(User)).scalars().first()
+        if user is None:
+            raise UserAlreadyExistsException(f"User with email {email} already exists")
         db.commit()
-        db.refresh(user)
-    except IntegrityError:
+    except (IntegrityError, UserAlreadyExistsException):
         db.rollback()
         raise
     return user
 
 
+def create_user_with_profile(db: Session, *, user_values: dict, profile_model, profile_values: dict):
+    """Insert a user and its profile as one transaction, without post-commit refreshes."""
+    dialect_name = _dialect_name(db)
+    try:
+        if dialect_name == "postgresql":
+            profile = db.execute(_signup_stmt(user_values, profile_model, profile_values)).scalars().first()
+        else:
+            # no data-modifying CTEs elsewhere (SQLite in tests): two statements, same transaction
+            user_id = db.execute(_insert_user_stmt(dialect_name, user_values).returning(User.id)).scalar()
+            profile = None if user_id is None else db.execute(_insert_profile_stmt(profile_model, user_id, profile_values)).scalars().first()
+        if profile is None:
+            raise UserAlreadyExistsException(f"User with email {user_values['email']} already exists")
+        db.commit()
+    except (IntegrityError, UserAlreadyExistsException):
+        db.rollback()
+        raise
+    return profile
+
+
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = db.query(User).filter(User.email == email, User.is_deleted == False).first()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # stored hash predates the current scheme/cost: upgrade it now that we have the plaintext
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email).first()
+
+
+# async variants used by the API routes; bcrypt runs in the password process pool so it never blocks the event loop
+
+
+async def create_user_async(db: AsyncSession, *, email: str, password: str, role: str = "patient", first_name: str | None = None, last_name: str | None = None) -> User:
+    hashed = await hash_password_async(password)
+    stmt = _insert_user_stmt(_dialect_name(db), dict(email=email, hashed_password=hashed, first_name=first_name, last_name=last_name, role=role))
+    try:
+        user = (await db.execute(stmt.returning(User))).scalars().first()
+        if user is None:
+            raise UserAlreadyExistsException(f"User with email {email} already exists")
+        await db.commit()
+    except (IntegrityError, UserAlreadyExistsException):
+        await db.rollback()
+        raise
+    return user
+
+
+async def create_user_with_profile_async(db: AsyncSession, *, user_values: dict, profile_model, profile_values: dict):
+    dialect_name = _dialect_name(db)
+    try:
+        if dialect_name == "postgresql":
+            profile = (await db.execute(_signup_stmt(user_values, profile_model, profile_values))).scalars().first()
+        else:
+            user_id = (await db.execute(_insert_user_stmt(dialect_name, user_values).returning(User.id))).scalar()
+            profile = None if user_id is None else (await db.execute(_insert_profile_stmt(profile_model, user_id, profile_values))).scalars().first()
+        if profile is None:
+            raise UserAlreadyExistsException(f"User with email {user_values['email']} already exists")
+        await db.commit()
+    except (IntegrityError, UserAlreadyExistsException):
+        await db.rollback()
+        raise
+    return profile
+
+
+async def bulk_create_users_with_profiles_async(db: AsyncSession, *, rows: list[tuple[dict, dict]], profile_model) -> dict[str, int]:
+    """Insert pre-hashed ``(user_values, profile_values)`` pairs in two batched INSERT ... RETURNING statements.
+
+    Emails that already exist are skipped. Returns ``{email: profile id}`` for the created rows.
+    """
+    if not rows:
+        return {}
+    try:
+        result = await db.execute(_insert_user_stmt(_dialect_name(db)).returning(User.id, User.email), [user for user, _ in rows])
+        user_ids = {email: user_id for user_id, email in result}
+        profile_rows = [dict(user_id=user_ids[user["email"]], **profile) for user, profile in rows if user["email"] in user_ids]
+        emails_by_user = {user_id: email for email, user_id in user_ids.items()}
+        created = {}
+        if profile_rows:
+            result = await db.execute(insert(profile_model).returning(profile_model.id, profile_model.user_id), profile_rows)
+            created = {emails_by_user[user_id]: profile_id for profile_id, user_id in result}
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
+    return created
+
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> User | None:
+    result = await db.execute(select(User).where(User.email == email, User.is_deleted == False))
+    user = result.scalars().first()
+    if not user:
+        return None
+    verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> User | None:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def get_user_auth_state_async(db: AsyncSession, user_id: int):
+    # just the columns authorization needs, as a row rather than a tracked ORM object
+    result = await db.execute(select(User.id, User.role, User.is_active, User.is_deleted).where(User.id == user_id))
+    return result.first()
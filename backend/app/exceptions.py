@@ -5,4 +5,8 @@ class CentryTestException(Exception):
 
 class DatabaseConnectionException(Exception):
     """Raised when database connection fails."""
-    pass
\ No newline at end of file
+    pass
+
+class UserAlreadyExistsException(Exception):
+    """Raised when a user is created with an email that is already registered."""
+    pass
@@ -1,67 +1,197 @@
 from __future__ import annotations
 
+import asyncio
 import re
+import time
 
-from fastapi import Request
-from starlette.concurrency import iterate_in_threadpool
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-from starlette.responses import StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config.base import settings
+from app.utils.etags import etag_matches
+from app.wrappers.cache_keys import CachedEndpoint, build_cache_key
 from app.wrappers.cache_wrappers import CacheUtils
 
+POLL_INTERVAL = 0.05
 
-class CacheMiddleware(BaseHTTPMiddleware):
-    def __init__(
-        self,
-        app,
-        cached_endpoints: list[str],
-    ):
-        super().__init__(app)
-        self.cached_endpoints = cached_endpoints
-
-    def matches_any_path(self, path_url):
-        for end_point in self.cached_endpoints:
-            if end_point in path_url:
-                return True
-        return False
-
-    async def handle_max_age(self, max_age, response_body, key):
-        if max_age:
-            await CacheUtils.create_cache(response_body[0].decode(), key, max_age)
-
-    async def dispatch(self, request: Request, call_next) -> Response:
-        path_url = request.url.path
-        request_type = request.method
-        cache_control = request.headers.get("Cache-Control", None)
-        auth = request.headers.get("Authorization", "token public")
-        token = auth.split(" ")[1]
-        max_age = settings.CACHE_MAX_AGE
-        key = f"{path_url}_{token}"
-        matches = self.matches_any_path(path_url)
-
-        if request_type != "GET":
-            return await call_next(request)
-
-        stored_cache, expire = await CacheUtils.retrieve_cache(key)
-        res = stored_cache and cache_control != "no-cache"
-
-        if res:
-            headers = {"Cache-Control": f"max-age:{expire}"}
-            return StreamingResponse(iter([stored_cache]), media_type="application/json", headers=headers)
-
-        response: Response = await call_next(request)
-        response_body = [chunk async for chunk in response.body_iterator]
-        response.body_iterator = iterate_in_threadpool(iter(response_body))
-        if response.status_code == 200:
-            if cache_control == "no-store":
-                return response
-            if cache_control:
-                max_age_match = re.search(r"max-age=(\d+)", cache_control)
-                if max_age_match:
-                    max_age = int(max_age_match.group(1))
-                    await self.handle_max_age(max_age, response_body, key)
-            elif matches:
-                await CacheUtils.create_cache(response_body[0].decode(), key, max_age)
-        return response
+
+def pack_entry(body: str, max_age: int, etag: str | None = None) -> str:
+    # entries outlive their max-age by CACHE_STALE_SECONDS, so the fresh-until time travels with the body
+    header = f"{time.time() + max_age:.3f}" + (f" {etag}" if etag else "")
+    return f"{header}\n{body}"
+
+
+def unpack_entry(stored: str | None) -> tuple[str, float, str | None] | None:
+    """(body, seconds it stays fresh (negative once stale), ETag) or None for a miss or an unreadable entry."""
+    if stored is None:
+        return None
+    header, sep, body = stored.partition("\n")
+    fresh_until, _, etag = header.partition(" ")
+    try:
+        return body, float(fresh_until) - time.time(), etag or None
+    except ValueError:
+        return None
+
+
+class CacheMiddleware:
+    """Response cache for GET endpoints, as plain ASGI.
+
+    Body messages are forwarded to the client as they arrive and copied aside
+    on the way; once the last one is sent, a 200 response no larger than
+    ``max_body_bytes`` is stored. Bigger responses stop being copied as soon as
+    they cross the limit and are never buffered.
+
+    Each key is computed by one request at a time: concurrent misses in this
+    process wait on the leader's future, and other processes wait on a short
+    backend lock (Redis) and then read the leader's entry. An expired entry is
+    served, marked STALE, for CACHE_STALE_SECONDS while the leader refreshes it.
+
+    Entries of tagged endpoints are registered under their tags and purged when
+    a commit touches the rows behind them (``app.wrappers.cache_tags``). The
+    endpoint's ETag is stored with the body, and cached answers to a matching
+    If-None-Match are 304s.
+    """
+
+    def __init__(self, app: ASGIApp, cached_endpoints: list[CachedEndpoint | str], max_body_bytes: int = settings.CACHE_MAX_BODY_BYTES):
+        self.app = app
+        # a bare string is a full-path regex cached per user
+        self.cached_endpoints = [end_point if isinstance(end_point, CachedEndpoint) else CachedEndpoint(end_point) for end_point in cached_endpoints]
+        self.max_body_bytes = max_body_bytes
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def match(self, path_url) -> CachedEndpoint | None:
+        return next((end_point for end_point in self.cached_endpoints if end_point.matches(path_url)), None)
+
+    @staticmethod
+    def max_age_for(cache_control: str | None, default: int | None = None) -> int:
+        max_age = settings.CACHE_MAX_AGE if default is None else default
+        if cache_control:
+            if "no-store" in cache_control:
+                return 0
+            max_age_match = re.search(r"max-age=(\d+)", cache_control)
+            if max_age_match:
+                # clients may shorten the server's lifetime, not extend it
+                max_age = min(int(max_age_match.group(1)), max_age)
+        return max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        end_point = self.match(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if end_point is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        cache_control = request_headers.get("cache-control")
+        if_none_match = request_headers.get("if-none-match")
+        key = build_cache_key(end_point, scope)
+        vary = end_point.vary_header()
+        max_age = self.max_age_for(cache_control, end_point.max_age)
+        tags = end_point.tags_for(scope["path"])
+
+        entry = None
+        if cache_control != "no-cache":
+            entry = unpack_entry((await CacheUtils.retrieve_cache(key))[0])
+            if entry is not None and (entry[1] > 0 or key in self._inflight):
+                # fresh, or stale while someone in this process is already refreshing it
+                await self.send_cached(send, entry, vary, if_none_match)
+                return
+        if not max_age:
+            await self.app(scope, receive, send)
+            return
+
+        if entry is None and key in self._inflight:
+            try:
+                computed = await asyncio.wait_for(asyncio.shield(self._inflight[key]), settings.CACHE_LOCK_SECONDS)
+            except asyncio.TimeoutError:
+                computed = None
+            if computed is not None:
+                await self.send_cached(send, computed, vary, if_none_match)
+            else:
+                await self.compute(scope, receive, send, key, max_age, vary, tags)
+            return
+
+        # this request leads; register before the next await so concurrent requests see it
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        lock = None
+        try:
+            lock = await CacheUtils.acquire_lock(key, settings.CACHE_LOCK_SECONDS)
+            if lock is None:
+                # another process is computing this key: serve what we have, or wait for its entry
+                available = entry if entry is not None else await self.wait_for_entry(key)
+                if available is not None:
+                    future.set_result(available)
+                    await self.send_cached(send, available, vary, if_none_match)
+                    return
+            future.set_result(await self.compute(scope, receive, send, key, max_age, vary, tags))
+        finally:
+            if not future.done():
+                future.set_result(None)
+            del self._inflight[key]
+            if lock is not None:
+                await CacheUtils.release_lock(key, lock)
+
+    async def wait_for_entry(self, key: str) -> tuple[str, float, str | None] | None:
+        deadline = time.monotonic() + settings.CACHE_LOCK_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            entry = unpack_entry((await CacheUtils.retrieve_cache(key))[0])
+            if entry is not None and entry[1] > 0:
+                return entry
+        return None
+
+    async def compute(self, scope: Scope, receive: Receive, send: Send, key: str, max_age: int, vary: str | None, tags: tuple[str, ...] = ()) -> tuple[str, float, str | None] | None:
+        """Run the endpoint, streaming its response to the client; returns the entry if one was stored."""
+        # read before the endpoint queries anything: a purge after this point voids the entry
+        versions = await CacheUtils.tag_versions(tags) if tags else None
+        chunks: list[bytes] = []
+        size = 0
+        capturing = False
+        etag = None
+        stored = None
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal size, capturing, etag, stored
+            if message["type"] == "http.response.start":
+                capturing = message["status"] == 200
+                headers = MutableHeaders(scope=message)
+                etag = headers.get("etag")
+                headers["x-cache"] = "MISS"
+                if vary:
+                    headers.add_vary_header(vary)
+            elif message["type"] == "http.response.body" and capturing:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.max_body_bytes:
+                    capturing = False
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+            await send(message)
+            if capturing and message["type"] == "http.response.body" and not message.get("more_body", False):
+                stored = (b"".join(chunks).decode(), max_age, etag)
+                await CacheUtils.create_cache(pack_entry(stored[0], max_age, etag), key, max_age + settings.CACHE_STALE_SECONDS, tags, versions)
+
+        await self.app(scope, receive, send_and_capture)
+        return stored
+
+    @staticmethod
+    async def send_cached(send: Send, entry: tuple[str, float, str | None], vary: str | None = None, if_none_match: str | None = None) -> None:
+        body, fresh_for, etag = entry
+        headers = [
+            # clients never keep a copy past CACHE_MAX_AGE, however long the server may keep it
+            (b"cache-control", f"max-age={min(max(int(fresh_for), 0), settings.CACHE_MAX_AGE)}".encode()),
+            (b"x-cache", b"HIT" if fresh_for > 0 else b"STALE"),
+        ]
+        if etag:
+            headers.append((b"etag", etag.encode()))
+        if vary:
+            headers.append((b"vary", vary.encode()))
+        if etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        content = body.encode()
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
@@ -1,35 +1,171 @@
+"""Per-route request rate limits, keyed by the authenticated user or, for anonymous callers, the client IP.
+
+Limits use GCRA (generic cell rate algorithm): a key stores only its
+"theoretical arrival time", and ``count/period`` allows ``count`` requests in a
+burst, then one more every ``period / count`` seconds, with no fixed windows
+to reset. With ``REDIS_URL`` set, the check-and-update is one Lua script, so it
+is atomic across processes and costs a single round trip. Without Redis, or
+while it is unreachable, each process limits on its own.
+"""
 from __future__ import annotations
 
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import NamedTuple
 
-from app.config.redis_config import get_redis_pool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-MAX_REQUESTS = 10000
-TIME_WINDOW = 60
+from app.config.base import settings
+from app.config.redis_config import REDIS_ERRORS, get_redis_pool
+from app.constants.jwt_utils import decode_access_token
 
+KEY_PREFIX = "rate-limit"
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
 
-        redis = await get_redis_pool()
+class RateLimit(NamedTuple):
+    count: int
+    period: float
+
+    @classmethod
+    def parse(cls, spec: str) -> RateLimit:
+        """``"300/60"``: 300 requests per 60 seconds."""
+        count, _, period = spec.partition("/")
+        return cls(int(count), float(period))
+
+    @property
+    def interval_ms(self) -> int:
+        return max(math.ceil(self.period * 1000 / self.count), 1)
+
+    @property
+    def tolerance_ms(self) -> int:
+        return self.interval_ms * self.count
+
+
+class RateLimitRule:
+    """Routes matching ``pattern`` (a full-path regex) and ``methods`` share one limit per caller.
+
+    ``limit`` applies to each anonymous client IP, ``user_limit`` (default: ``limit``)
+    to each authenticated user, wherever they connect from.
+    """
+
+    def __init__(self, name: str, pattern: str, limit: RateLimit, *, user_limit: RateLimit | None = None, methods: tuple[str, ...] | None = None) -> None:
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.limit = limit
+        self.user_limit = user_limit or limit
+        self.methods = methods
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.methods is None or method in self.methods) and self.pattern.fullmatch(path) is not None
+
+
+class LocalRateLimitStore:
+    """In-process GCRA state: LRU of key -> theoretical arrival time (ms), capped at ``max_keys``."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._tats: OrderedDict[str, float] = OrderedDict()
+
+    async def hit(self, key: str, interval_ms: int, tolerance_ms: int) -> tuple[bool, int, int]:
+        now = time.monotonic() * 1000
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + interval_ms
+        if new_tat - now > tolerance_ms:
+            return False, math.ceil(new_tat - now - tolerance_ms), 0
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        return True, 0, int((tolerance_ms - (new_tat - now)) // interval_ms)
+
+
+class RedisRateLimitStore:
+    """The same GCRA step as one server-side script, timed by the Redis clock so workers' clocks don't matter."""
+
+    # KEYS[1]: bucket; ARGV: emission interval (ms), burst tolerance (ms)
+    # returns {allowed (0/1), retry after (ms), remaining}
+    _script = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local new_tat = tat + interval
+if new_tat - now > tolerance then
+  return {0, new_tat - now - tolerance, 0}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0, math.floor((tolerance - (new_tat - now)) / interval)}
+"""
+
+    def __init__(self, redis) -> None:
+        self.redis = redis
+
+    async def hit(self, key: str, interval_ms: int, tolerance_ms: int) -> tuple[bool, int, int]:
+        allowed, retry_after_ms, remaining = await self.redis.eval(self._script, 1, key, interval_ms, tolerance_ms)
+        return allowed == 1, int(retry_after_ms), int(remaining)
+
+
+def caller_identity(headers: Headers, scope: Scope) -> tuple[str, bool]:
+    """("user:<sub>", True) for a valid bearer access token, else ("ip:<address>", False)."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
         try:
-            request_count = await redis.get(client_ip)
-            request_count = int(request_count) if request_count else 0
-
-            if request_count >= MAX_REQUESTS:
-                ttl = await redis.ttl(client_ip)
-                detail = {"error": "Too Many Requests", "message": f"Rate limit exceeded. Try again in {ttl} seconds."}
-                return JSONResponse(status_code=429, content=detail)
-
-            pipe = redis.pipeline()
-            pipe.incr(client_ip)
-            pipe.expire(client_ip, TIME_WINDOW)
-            await pipe.execute()
-        finally:
-            print("Finally Block in Rate Limit exceeded")
-
-        response = await call_next(request)
-        return response
+            return f"user:{decode_access_token(token)['sub']}", True
+        except Exception:
+            # a bad token is limited like any anonymous caller; the route answers 401
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}", False
+
+
+class RateLimitMiddleware:
+    """Applies the first rule matching each HTTP request; requests no rule matches are not limited."""
+
+    def __init__(self, app: ASGIApp, rules: list[RateLimitRule], max_keys: int = settings.RATE_LIMIT_MAX_KEYS) -> None:
+        self.app = app
+        self.rules = rules
+        self.local = LocalRateLimitStore(max_keys)
+
+    def match(self, method: str, path: str) -> RateLimitRule | None:
+        return next((rule for rule in self.rules if rule.matches(method, path)), None)
+
+    async def hit(self, key: str, limit: RateLimit) -> tuple[bool, int, int]:
+        redis = await get_redis_pool()
+        if redis is not None:
+            try:
+                return await RedisRateLimitStore(redis).hit(key, limit.interval_ms, limit.tolerance_ms)
+            except REDIS_ERRORS as exc:
+                print(f"rate limiter: Redis unavailable ({exc}); limiting per process")
+        return await self.local.hit(key, limit.interval_ms, limit.tolerance_ms)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        rule = self.match(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        identity, authenticated = caller_identity(Headers(scope=scope), scope)
+        limit = rule.user_limit if authenticated else rule.limit
+        allowed, retry_after_ms, remaining = await self.hit(f"{KEY_PREFIX}:{rule.name}:{identity}", limit)
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, try again later"},
+                headers={"Retry-After": str(math.ceil(retry_after_ms / 1000)), "X-RateLimit-Limit": str(limit.count), "X-RateLimit-Remaining": "0"},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["x-ratelimit-limit"] = str(limit.count)
+                headers["x-ratelimit-remaining"] = str(remaining)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
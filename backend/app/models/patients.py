@@ -14,8 +14,12 @@ class PatientProfile(Base):
     country = Column(String(100), nullable=True)
     province = Column(String(100), nullable=True)
     ethnicity = Column(String(100), nullable=True)
+    # bumped by the ORM on every update; detail responses use it as their ETag
+    version = Column(Integer, nullable=False, server_default="1")
 
     user = relationship("User", backref="patient_profile")
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self) -> str:  # pragma: no cover - trivial
         return f"<Patient user={self.user_id}>"
@@ -14,8 +14,12 @@ class PractitionerProfile(Base):
     practitioner_id = Column(String(100), nullable=False, unique=True)
     institution = Column(String(255), nullable=True)
     institution_location = Column(String(255), nullable=True)
+    # bumped by the ORM on every update; detail responses use it as their ETag
+    version = Column(Integer, nullable=False, server_default="1")
 
     user = relationship("User", backref="practitioner_profile")
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self) -> str:  # pragma: no cover - trivial
         return f"<Practitioner {self.practitioner_id} user={self.user_id}>"
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+
+from app.sessions.db import Base
+
+
+class RefreshToken(Base):
+    """One issued refresh token. Rotation revokes the row and points it at its successor;
+    every token descended from the same login shares ``family_id``."""
+
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String(32), nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover - trivial
+        return f"<RefreshToken {self.jti} user={self.user_id}>"
+
+
+class RevokedToken(Base):
+    """Access tokens revoked before their expiry (logout); rows are useless once ``expires_at`` passes."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:  # pragma: no cover - trivial
+        return f"<RevokedToken {self.jti}>"
@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from .auth import auth_router
+
+__all__ = ["auth_router"]
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.auth.auth_request import RefreshRequest
+from app.schemas.auth.auth_response import TokenResponse
+from app.sessions.db import create_async_session
+from app.utils.tokens import refresh_tokens_async, revoke_tokens_async
+
+auth_router = APIRouter(prefix="/api/auth", tags=["auth"])
+
+
+@auth_router.post("/refresh", response_model=TokenResponse)
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(create_async_session)):
+    """Trade a refresh token for a new access token and a new refresh token; the old one is spent."""
+    return await refresh_tokens_async(db, payload.refresh_token)
+
+
+@auth_router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(payload: RefreshRequest, request: Request, db: AsyncSession = Depends(create_async_session)):
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    await revoke_tokens_async(db, refresh_token=payload.refresh_token, access_token=token if scheme.lower() == "bearer" else None)
@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from .internal import internal_router
+
+__all__ = ["internal_router"]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.config.base import settings
+from app.sessions.pool_stats import pool_snapshots
+from app.utils.auth import password_pool
+from app.wrappers.cache_wrappers import CacheUtils
+
+
+def require_internal_token(x_internal_token: str | None = Header(default=None)):
+    # fail closed: without a configured token the internal routes don't exist
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_internal_token is None or not hmac.compare_digest(x_internal_token.encode(), settings.INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+internal_router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False, dependencies=[Depends(require_internal_token)])
+
+
+@internal_router.get("/db-pool")
+async def db_pool_stats():
+    return pool_snapshots()
+
+
+@internal_router.get("/password-pool")
+async def password_pool_stats():
+    return {"workers": password_pool.max_workers, "max_pending": password_pool.max_pending, "pending": password_pool.pending, "rejected": password_pool.rejected}
+
+
+@internal_router.get("/response-cache")
+async def response_cache_stats():
+    return await CacheUtils.stats()
@@ -1,23 +1,31 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.auth.auth_request import LoginRequest
 from app.schemas.auth.auth_response import TokenResponse
-from app.schemas.patients import PatientSignupRequest, PatientResponse
-from app.daos.patients import create_patient, get_patient_by_id, list_patients
-from app.daos.users import authenticate_user
-from app.utils.auth import create_access_token
-from app.sessions.db import create_local_session
+from app.schemas.pagination import CursorPage
+from app.schemas.patients import PatientImportReport, PatientListItem, PatientSignupRequest, PatientResponse, patient_page_adapter
+from app.daos.patients import SEARCH_RANKS, create_patient_async, get_patient_by_id_async, get_patient_version_async, list_patients_async, stream_patients_async, search_patients_async
+from app.daos.users import authenticate_user_async
+from app.routes.internal.internal import require_internal_token
+from app.utils.tokens import issue_tokens_async
+from app.utils.roster_import import IMPORT_FORMATS, import_patients_async, iter_lines
+from app.utils.etags import content_etag, etag_matches, not_modified, row_etag
+from app.utils.export import EXPORT_FORMATS, stream_export
+from app.utils.login_throttle import client_ip, login_throttle
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, keyset_page
+from app.sessions.db import create_async_read_session, create_async_session
 
 router = APIRouter(prefix="/api/patients", tags=["patients"])
 
 
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def signup(payload: PatientSignupRequest, db: Session = Depends(create_local_session)):
+async def signup(payload: PatientSignupRequest, db: AsyncSession = Depends(create_async_session)):
     try:
-        profile = create_patient(
+        profile = await create_patient_async(
             db,
             email=payload.email,
             password=payload.password,
@@ -27,29 +35,101 @@ def signup(payload: PatientSignupRequest, db: Session = Depends(create_local_ses
             province=payload.province,
             ethnicity=payload.ethnicity,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    token = create_access_token(subject=str(profile.user_id))
-    return TokenResponse(access_token=token)
+    return await issue_tokens_async(db, profile.user_id)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(create_local_session)):
-    user = authenticate_user(db, payload.email, payload.password)
+async def login(payload: LoginRequest, request: Request, db: AsyncSession = Depends(create_async_session)):
+    ip = client_ip(request)
+    # locked-out emails/IPs are turned away before the user lookup and the password hash
+    await login_throttle.check(payload.email, ip)
+    try:
+        user = await authenticate_user_async(db, payload.email, payload.password)
+    except BaseException:
+        await login_throttle.release(payload.email, ip)
+        raise
     if not user:
+        await login_throttle.record_failure(payload.email, ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(subject=str(user.id))
-    return TokenResponse(access_token=token)
+    await login_throttle.record_success(payload.email, ip)
+    return await issue_tokens_async(db, user.id)
+
+
+@router.post("/import", response_model=PatientImportReport, dependencies=[Depends(require_internal_token)])
+async def import_roster(request: Request, format: str | None = Query(None, description="csv or ndjson; defaults from Content-Type"), db: AsyncSession = Depends(create_async_session)):
+    """Bulk-import patients from a CSV (header row first) or NDJSON request body, streamed as it arrives.
+
+    An operator endpoint: it needs the internal token, like the /internal routes.
+    """
+    fmt = format or ("ndjson" if "json" in request.headers.get("Content-Type", "") else "csv")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    return await import_patients_async(db, iter_lines(request.stream()), fmt)
+
+
+@router.get("/", response_model=CursorPage[PatientListItem])
+async def list_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging, kept for old clients; use cursor"),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(create_async_read_session),
+):
+    position = decode_cursor(cursor)
+    rows = await list_patients_async(db, skip=skip, limit=limit + 1, after_id=position["id"] if position else None)
+    items, next_cursor = keyset_page(rows, limit)
+    page = patient_page_adapter.validate_python({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+    body = patient_page_adapter.dump_json(page)
+    etag = content_etag(body)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/search", response_model=CursorPage[PatientListItem])
+async def search(
+    q: str = Query(..., min_length=1, max_length=100, description="Name or email, matched by prefix first"),
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(create_async_read_session),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    position = decode_cursor(cursor, fields=("rank", "id"))
+    if position is not None and position["rank"] not in SEARCH_RANKS:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = await search_patients_async(db, q, limit=limit + 1, after=position)
+    items, next_cursor = keyset_page(rows, limit, position_of=lambda row: {"rank": row.rank, "id": row.id})
+    page = patient_page_adapter.validate_python({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+    return Response(content=patient_page_adapter.dump_json(page), media_type="application/json")
+
 
+@router.get("/export", dependencies=[Depends(require_internal_token)])
+async def export(format: str = Query("ndjson", description="ndjson or csv")):
+    """Stream every patient joined with its user; memory use doesn't grow with the table.
 
-@router.get("/", response_model=list)
-def list_all(skip: int = 0, limit: int = 100, db: Session = Depends(create_local_session)):
-    return list_patients(db, skip=skip, limit=limit)
+    An operator endpoint behind the internal token; soft-deleted users are left out.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    columns = list(PatientListItem.model_fields)
+    headers = {"Content-Disposition": f'attachment; filename="patients.{format}"'}
+    return StreamingResponse(stream_export(stream_patients_async, columns, format), media_type=EXPORT_FORMATS[format], headers=headers)
 
 
 @router.get("/{patient_id}", response_model=PatientResponse)
-def get_by_patient_id(patient_id: int, db: Session = Depends(create_local_session)):
-    p = get_patient_by_id(db, patient_id)
+async def get_by_patient_id(patient_id: int, response: Response, if_none_match: str | None = Header(None), db: AsyncSession = Depends(create_async_read_session)):
+    if if_none_match:
+        # revalidation: compare the version column before loading or serializing the profile
+        version = await get_patient_version_async(db, patient_id)
+        if version is not None and etag_matches(if_none_match, row_etag("patient", patient_id, version)):
+            return not_modified(row_etag("patient", patient_id, version))
+    p = await get_patient_by_id_async(db, patient_id)
     if not p:
         raise HTTPException(status_code=404, detail="Not found")
+    response.headers["ETag"] = row_etag("patient", p.id, p.version)
     return p
@@ -1,48 +1,98 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.auth.auth_request import LoginRequest, SignupRequest
 from app.schemas.auth.auth_response import TokenResponse
-from app.daos.practitioners import create_practitioner, get_practitioner_by_user, list_practitioners, get_practitioner_by_id
-from app.daos.users import authenticate_user
-from app.utils.auth import create_access_token
-from app.sessions.db import create_local_session
+from app.schemas.pagination import CursorPage
+from app.schemas.practitioners import PractitionerListItem, PractitionerResponse, practitioner_page_adapter
+from app.daos.practitioners import create_practitioner_async, get_practitioner_by_user, list_practitioners_async, stream_practitioners_async, get_practitioner_by_id_async, get_practitioner_version_async
+from app.daos.users import authenticate_user_async
+from app.routes.internal.internal import require_internal_token
+from app.utils.tokens import issue_tokens_async
+from app.utils.etags import content_etag, etag_matches, not_modified, row_etag
+from app.utils.export import EXPORT_FORMATS, stream_export
+from app.utils.login_throttle import client_ip, login_throttle
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, keyset_page
+from app.sessions.db import create_async_read_session, create_async_session
 
 router = APIRouter(prefix="/api/practitioners", tags=["practitioners"])
 
 
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def signup(payload: SignupRequest, db: Session = Depends(create_local_session)):
+async def signup(payload: SignupRequest, db: AsyncSession = Depends(create_async_session)):
     # check existing email
     existing = get_practitioner_by_user(db, payload.email) if False else None
     # create user + profile
     try:
-        profile = create_practitioner(db, email=payload.email, password=payload.password, practitioner_id=f"PR-{payload.email}", first_name=payload.first_name, last_name=payload.last_name)
+        profile = await create_practitioner_async(db, email=payload.email, password=payload.password, practitioner_id=f"PR-{payload.email}", first_name=payload.first_name, last_name=payload.last_name)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    token = create_access_token(subject=str(profile.user_id))
-    return TokenResponse(access_token=token)
+    return await issue_tokens_async(db, profile.user_id)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(create_local_session)):
-    user = authenticate_user(db, payload.email, payload.password)
+async def login(payload: LoginRequest, request: Request, db: AsyncSession = Depends(create_async_session)):
+    ip = client_ip(request)
+    # locked-out emails/IPs are turned away before the user lookup and the password hash
+    await login_throttle.check(payload.email, ip)
+    try:
+        user = await authenticate_user_async(db, payload.email, payload.password)
+    except BaseException:
+        await login_throttle.release(payload.email, ip)
+        raise
     if not user:
+        await login_throttle.record_failure(payload.email, ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(subject=str(user.id))
-    return TokenResponse(access_token=token)
+    await login_throttle.record_success(payload.email, ip)
+    return await issue_tokens_async(db, user.id)
+
+
+@router.get("/", response_model=CursorPage[PractitionerListItem])
+async def list_all(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging, kept for old clients; use cursor"),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(create_async_read_session),
+):
+    position = decode_cursor(cursor)
+    rows = await list_practitioners_async(db, skip=skip, limit=limit + 1, after_id=position["id"] if position else None)
+    items, next_cursor = keyset_page(rows, limit)
+    page = practitioner_page_adapter.validate_python({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+    body = practitioner_page_adapter.dump_json(page)
+    etag = content_etag(body)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
 
+@router.get("/export", dependencies=[Depends(require_internal_token)])
+async def export(format: str = Query("ndjson", description="ndjson or csv")):
+    """Stream every practitioner joined with its user; memory use doesn't grow with the table.
 
-@router.get("/", response_model=list)
-def list_all(skip: int = 0, limit: int = 100, db: Session = Depends(create_local_session)):
-    return list_practitioners(db, skip=skip, limit=limit)
+    An operator endpoint behind the internal token; soft-deleted users are left out.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    columns = list(PractitionerListItem.model_fields)
+    headers = {"Content-Disposition": f'attachment; filename="practitioners.{format}"'}
+    return StreamingResponse(stream_export(stream_practitioners_async, columns, format), media_type=EXPORT_FORMATS[format], headers=headers)
 
 
-@router.get("/{practitioner_id}")
-def get_by_practitioner_id(practitioner_id: str, db: Session = Depends(create_local_session)):
-    p = get_practitioner_by_id(db, practitioner_id)
+@router.get("/{practitioner_id}", response_model=PractitionerResponse)
+async def get_by_practitioner_id(practitioner_id: str, response: Response, if_none_match: str | None = Header(None), db: AsyncSession = Depends(create_async_read_session)):
+    if if_none_match:
+        # revalidation: compare the version column before loading or serializing the profile
+        current = await get_practitioner_version_async(db, practitioner_id)
+        if current is not None and etag_matches(if_none_match, row_etag("practitioner", *current)):
+            return not_modified(row_etag("practitioner", *current))
+    p = await get_practitioner_by_id_async(db, practitioner_id)
     if not p:
         raise HTTPException(status_code=404, detail="Not found")
+    response.headers["ETag"] = row_etag("practitioner", p.id, p.version)
     return p
@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from .well_known import well_known_router
+
+__all__ = ["well_known_router"]
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Response
+
+from app.constants.jwt_utils import jwks
+
+well_known_router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+
+@well_known_router.get("/jwks.json")
+async def jwks_document(response: Response):
+    """Public keys that verify access tokens, by ``kid``; downstream verifiers cache them."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return jwks()
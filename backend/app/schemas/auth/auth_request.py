@@ -13,3 +13,7 @@ class SignupRequest(BaseModel):
     password: str
     first_name: str | None = None
     last_name: str | None = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
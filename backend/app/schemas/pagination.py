@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: list[T]
+    # pass back as ?cursor= to fetch the following page; null on the last page
+    next_cursor: str | None = None
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, TypeAdapter
 from typing import Optional
 
+from app.schemas.pagination import CursorPage
+
 
 class PatientSignupRequest(BaseModel):
     email: EmailStr
@@ -23,3 +25,35 @@ class PatientResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PatientListItem(BaseModel):
+    id: int
+    user_id: int
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    country: Optional[str] = None
+    province: Optional[str] = None
+    ethnicity: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+# built once at import; list routes validate row projections and dump JSON through it directly
+patient_page_adapter = TypeAdapter(CursorPage[PatientListItem])
+
+
+class ImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class PatientImportReport(BaseModel):
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    # capped; ``failed`` has the full count
+    errors: list[ImportRowError] = []
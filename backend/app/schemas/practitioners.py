@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, TypeAdapter
+from typing import Optional
+
+from app.schemas.pagination import CursorPage
+
+
+class PractitionerResponse(BaseModel):
+    id: int
+    user_id: int
+    practitioner_id: str
+    institution: Optional[str] = None
+    institution_location: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PractitionerListItem(BaseModel):
+    id: int
+    user_id: int
+    practitioner_id: str
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    institution: Optional[str] = None
+    institution_location: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+# built once at import; list routes validate row projections and dump JSON through it directly
+practitioner_page_adapter = TypeAdapter(CursorPage[PractitionerListItem])
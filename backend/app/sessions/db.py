@@ -3,16 +3,23 @@ from __future__ import annotations
 import json
 import os
 import sys
-from collections.abc import Generator
+import threading
+from collections.abc import AsyncGenerator, Generator
+from contextlib import AsyncExitStack
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, MetaData
+from fastapi import Request
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.config.base import settings
 from app.exceptions import DatabaseConnectionException
+from app.sessions.pool_stats import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, register_engine
+from app.sessions.routing import RoutingSession, read_your_writes, request_principal
 
 load_dotenv()
 
@@ -22,39 +29,146 @@ if settings.DATABASE_URL:
 else:
     database_uri = f"postgresql+psycopg2://{settings.DB_USERNAME}:{settings.DB_PASSWORD}@{settings.DB_HOSTNAME}:{settings.DB_PORT}/{settings.DB_NAME}"
 
-# Use SQLite only when running pytest
-if "PYTEST_CURRENT_TEST" in os.environ or "pytest" in sys.modules:
-    engine = create_engine(
-        "sqlite://",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+# The async engine talks to the same database through asyncpg
+if settings.ASYNC_DATABASE_URL:
+    async_database_uri = settings.ASYNC_DATABASE_URL
 else:
-    engine = create_engine(database_uri)
+    async_database_uri = make_url(database_uri).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+# Optional read replica, mirrored the same way
+read_database_uri = settings.READ_DATABASE_URL
+if settings.ASYNC_READ_DATABASE_URL:
+    async_read_database_uri = settings.ASYNC_READ_DATABASE_URL
+elif read_database_uri:
+    async_read_database_uri = make_url(read_database_uri).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+else:
+    async_read_database_uri = None
 
 metadata = MetaData()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engines are created on first use (or by the app lifespan), never at import time,
+# so Alembic, test collection and worker boot don't pay for a DB round trip.
+# RoutingSession sends read-only work to the replica engine stored in ``info["replica"]``.
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+# expire_on_commit=False: attribute access after commit must not trigger an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False)
 
 # Expose metadata for Alembic autogenerate
 Base = declarative_base(metadata=metadata)
 target_metadata = Base.metadata  # used by Alembic
 
-# Test DB connection
-try:
-    with engine.connect() as conn:
-        print("\n-------------------------- Database connected ----------------------------")
-        print(f"DB URI: {database_uri}")
-        print("-----------------------------------------------------------------------\n")
-except Exception as e:
-    raise DatabaseConnectionException(f"Failed to connect to database: {e}")
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_read_engine: Engine | None = None
+_async_read_engine: AsyncEngine | None = None
+_engine_lock = threading.Lock()
+
+# Use SQLite only when running pytest. The sync and async engines share one
+# named in-memory database so tables created through the sync engine are
+# visible to the async sessions used by the routes.
+TESTING = "PYTEST_CURRENT_TEST" in os.environ or "pytest" in sys.modules
+TEST_DATABASE = "file:lungsense_test?mode=memory&cache=shared&uri=true"
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def get_engine() -> Engine:
+    global _engine, _read_engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if TESTING:
+                    _engine = create_engine(f"sqlite:///{TEST_DATABASE}", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+                else:
+                    _engine = create_engine(database_uri, poolclass=InstrumentedQueuePool, **_pool_options())
+                _read_engine = _engine
+                if read_database_uri and not TESTING:
+                    _read_engine = create_engine(read_database_uri, poolclass=InstrumentedQueuePool, **_pool_options())
+                    register_engine("replica", _read_engine)
+                SessionLocal.configure(bind=_engine, info={"replica": _read_engine})
+                register_engine("primary", _engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_read_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                if TESTING:
+                    _async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE}", poolclass=StaticPool)
+                else:
+                    _async_engine = create_async_engine(async_database_uri, poolclass=InstrumentedAsyncAdaptedQueuePool, **_pool_options())
+                _async_read_engine = _async_engine
+                if async_read_database_uri and not TESTING:
+                    _async_read_engine = create_async_engine(async_read_database_uri, poolclass=InstrumentedAsyncAdaptedQueuePool, **_pool_options())
+                    register_engine("replica_async", _async_read_engine)
+                # Session.get_bind() works with sync engines, so hand it the replica's sync facade
+                AsyncSessionLocal.configure(bind=_async_engine, info={"replica": _async_read_engine.sync_engine})
+                register_engine("primary_async", _async_engine)
+    return _async_engine
+
+
+async def connect_engines(warm_up: int = 0) -> None:
+    """Create the engines, check connectivity and optionally pre-open ``warm_up`` pooled connections."""
+    get_engine()
+    engine = get_async_engine()
+    try:
+        async with AsyncExitStack() as stack:
+            # hold every connection until all are open so the pool really grows to ``warm_up``
+            for _ in range(max(warm_up, 1)):
+                conn = await stack.enter_async_context(engine.connect())
+                await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        raise DatabaseConnectionException(f"Failed to connect to database: {e}")
+    print("\n-------------------------- Database connected ----------------------------")
+    print(f"DB URI: {make_url(async_database_uri).render_as_string(hide_password=True)}")
+    print("-----------------------------------------------------------------------\n")
+
+
+async def dispose_engines() -> None:
+    global _engine, _async_engine, _read_engine, _async_read_engine
+    if _async_read_engine is not None and _async_read_engine is not _async_engine:
+        await _async_read_engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _read_engine is not None and _read_engine is not _engine:
+        _read_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = _async_engine = _read_engine = _async_read_engine = None
+
 
 def create_local_session() -> Generator[Session, None, None]:
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+
+async def create_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    get_async_engine()
+    async with AsyncSessionLocal(info={"principal": request_principal(request)}) as db:
+        yield db
+
+
+async def create_async_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes: queries go to the replica unless the caller wrote recently."""
+    get_async_engine()
+    principal = request_principal(request)
+    info = {"principal": principal, "read_only": True, "sticky_primary": read_your_writes.recently_wrote(principal)}
+    async with AsyncSessionLocal(info=info) as db:
+        yield db
+
 Base = declarative_base(metadata=metadata)
 
 
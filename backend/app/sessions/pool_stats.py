@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolStats:
+    """Checkout counters and wait-time histogram for one connection pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_time_total_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total_ms += wait_ms
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def histogram(self) -> dict[str, int]:
+        # cumulative, Prometheus style: every bucket counts the waits <= its bound
+        labels = [f"le_{bound}" for bound in WAIT_BUCKETS_MS] + ["le_inf"]
+        histogram, running = {}, 0
+        for label, count in zip(labels, self.wait_buckets):
+            running += count
+            histogram[label] = running
+        return histogram
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free slot and pre-ping."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters across it
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": self.stats.checkouts,
+            "checkout_timeouts": self.stats.checkout_timeouts,
+            "wait_time_total_ms": round(self.stats.wait_time_total_ms, 3),
+            "wait_time_ms": self.stats.histogram(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_engines: dict[str, Engine | AsyncEngine] = {}
+
+
+def register_engine(name: str, engine: Engine | AsyncEngine) -> None:
+    _engines[name] = engine
+
+
+def pool_snapshots() -> dict[str, dict]:
+    """Current stats of every registered engine whose pool is instrumented."""
+    snapshots = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if isinstance(pool, _InstrumentedPoolMixin):
+            snapshots[name] = pool.snapshot()
+    return snapshots
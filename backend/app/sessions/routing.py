@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from sqlalchemy import Select, event
+from sqlalchemy.orm import Session
+
+from app.config.base import settings
+from app.constants.jwt_utils import decode_access_token
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the read replica while it is flagged read-only.
+
+    ``info["replica"]`` holds the replica engine (the primary when no replica is
+    configured). Flushes and DML always go to the primary bind, as does anything
+    once the session has written or the caller is inside its read-your-writes window.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and uses_replica(self) and not self._flushing and isinstance(clause, Select):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def uses_replica(session: Session) -> bool:
+    info = session.info
+    return bool(info.get("read_only")) and not info.get("sticky_primary") and not info.get("wrote")
+
+
+class ReadYourWritesTracker:
+    """Remembers, per principal, until when reads must stay on the primary after a write."""
+
+    def __init__(self, window: float, max_entries: int = 100_000) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self._until: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark_write(self, principal: str) -> None:
+        with self._lock:
+            self._until[principal] = time.monotonic() + self.window
+            self._until.move_to_end(principal)
+            while len(self._until) > self.max_entries:
+                self._until.popitem(last=False)
+
+    def recently_wrote(self, principal: str) -> bool:
+        until = self._until.get(principal)
+        return until is not None and until > time.monotonic()
+
+
+read_your_writes = ReadYourWritesTracker(settings.READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flag_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _flag_dml(orm_execute_state):
+    # bulk INSERT/UPDATE/DELETE statements don't go through a flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    principal = session.info.get("principal")
+    if principal and session.info.get("wrote"):
+        read_your_writes.mark_write(principal)
+
+
+def request_principal(request: Request) -> str:
+    """Identify the caller by the access token's subject, falling back to the client address."""
+    auth = request.headers.get("Authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_access_token(token)['sub']}"
+        except Exception:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def replica_reads(func):
+    """Declare an async DAO read-only so its queries may be served by the replica."""
+
+    @functools.wraps(func)
+    async def wrapper(db, *args, **kwargs):
+        previous = db.info.get("read_only", False)
+        db.info["read_only"] = True
+        try:
+            return await func(db, *args, **kwargs)
+        finally:
+            db.info["read_only"] = previous
+
+    return wrapper
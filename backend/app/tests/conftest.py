@@ -1,26 +1,46 @@
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
 from app.app import create_app
-from app.sessions.db import engine, Base
+from app.config.base import settings
+from app.sessions.db import Base, get_async_engine, get_engine
+from app.wrappers.cache_wrappers import CacheUtils
 
 # ensure model modules are imported so metadata includes their tables
 import app.models.users  # registers users table
 import app.models.practitioners  # registers practitioners table
 import app.models.patients  # registers patients table
+import app.models.tokens  # registers refresh_tokens and revoked_tokens tables
 
 
-@pytest.fixture(scope="session")
+@pytest.fixture(scope="session", autouse=True)
 def setup_db():
     # Create all tables in the sqlite in-memory DB used for tests
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
+    yield
+    # the aiosqlite connection runs on its own thread and keeps the interpreter alive until disposed
+    asyncio.run(get_async_engine().dispose())
+    Base.metadata.drop_all(bind=get_engine())
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    # the response cache is process-wide; start every test cold
     yield
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(CacheUtils.clear_cache())
 
 
 @pytest.fixture
 def client(setup_db) -> TestClient:
     app = create_app()
     return TestClient(app)
+
+
+@pytest.fixture
+def internal_headers(monkeypatch) -> dict:
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal-test-token")
+    return {"X-Internal-Token": "internal-test-token"}
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+
+def test_import_does_not_touch_the_database():
+    # outside pytest the engine would point at Postgres, so any import-time connection attempt would fail here
+    code = "import app.app, app.sessions.db as db; assert db._engine is None and db._async_engine is None"
+    subprocess.run([sys.executable, "-c", code], check=True)
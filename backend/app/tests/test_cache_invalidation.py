@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.daos.patients import soft_delete_patient_async
+from app.daos.practitioners import hard_delete_practitioner_async, soft_delete_practitioner_async
+from app.models.practitioners import PractitionerProfile
+from app.sessions.db import AsyncSessionLocal
+from app.wrappers.cache_tags import purge, tag_cache
+from app.wrappers.cache_wrappers import CacheUtils, InMemoryCacheBackend
+
+
+def _cached(response) -> bool:
+    return response.headers.get("x-cache") == "HIT"
+
+
+def _patient_id(client: TestClient, email: str) -> int:
+    client.post("/api/patients/signup", json={"email": email, "password": "secretpw"})
+    return client.get("/api/patients/search", params={"q": email.split("@")[0]}).json()["items"][0]["id"]
+
+
+def test_memory_backend_purges_tags_and_refuses_stale_writes():
+    backend = InMemoryCacheBackend(max_bytes=1024)
+
+    async def scenario():
+        await backend.set("detail", "a", ttl=60, tags=("patient:1", "patients:list"))
+        await backend.set("other", "b", ttl=60, tags=("patient:2",))
+        before = await backend.tag_versions(("patient:1",))
+        await backend.invalidate_tags(("patients:list",))
+        # computed before the purge: dropped; computed after it: kept
+        await backend.set("late", "c", ttl=60, tags=("patients:list",), versions=await backend.tag_versions(("patients:list",)))
+        await backend.set("racing", "d", ttl=60, tags=("patient:1",), versions=before)
+        return [(await backend.get(key))[0] for key in ("detail", "other", "late", "racing")]
+
+    assert asyncio.run(scenario()) == [None, "b", "c", "d"]
+    assert backend._tagged == {"patient:2": {"other"}, "patients:list": {"late"}, "patient:1": {"racing"}}
+
+
+def test_memory_backend_bounds_tag_versions_and_refuses_writes_for_evicted_tags():
+    backend = InMemoryCacheBackend(max_bytes=1024, max_tags=2)
+
+    async def scenario():
+        before = await backend.tag_versions(("patient:1",))
+        await backend.invalidate_tags(("patient:2",))
+        await backend.tag_versions(("patient:3",))  # pushes patient:1 out
+        return await backend.set("racing", "d", ttl=60, tags=("patient:1",), versions=before)
+
+    assert asyncio.run(scenario()) is False
+    assert list(backend._versions) == ["patient:3", "patient:1"]
+
+
+def test_soft_delete_purges_the_cached_detail_and_listing(client: TestClient):
+    patient_id = _patient_id(client, "tagged-soft@example.com")
+    client.get(f"/api/patients/{patient_id}")
+    client.get("/api/patients/")
+    assert _cached(client.get(f"/api/patients/{patient_id}")) and _cached(client.get("/api/patients/"))
+
+    async def delete():
+        async with AsyncSessionLocal() as db:
+            await soft_delete_patient_async(db, patient_id)
+
+    asyncio.run(delete())
+    detail = client.get(f"/api/patients/{patient_id}")
+    assert not _cached(detail) and detail.status_code == 404
+    listing = client.get("/api/patients/", params={"limit": 500})
+    assert not _cached(listing)
+    assert patient_id not in [item["id"] for item in listing.json()["items"]]
+    # and the refilled entries don't bring it back either
+    assert client.get(f"/api/patients/{patient_id}").status_code == 404
+    assert patient_id not in [item["id"] for item in client.get("/api/patients/", params={"limit": 500}).json()["items"]]
+
+
+def test_soft_deleted_practitioners_leave_the_detail_and_listing(client: TestClient):
+    client.post("/api/practitioners/signup", json={"email": "tagged-soft-doc@example.com", "password": "secretpw"})
+    practitioner_id = "PR-tagged-soft-doc@example.com"
+    assert client.get(f"/api/practitioners/{practitioner_id}").status_code == 200
+
+    async def delete():
+        async with AsyncSessionLocal() as db:
+            profile_id = (await db.execute(select(PractitionerProfile.id).where(PractitionerProfile.practitioner_id == practitioner_id))).scalar_one()
+            await soft_delete_practitioner_async(db, profile_id)
+
+    asyncio.run(delete())
+    assert client.get(f"/api/practitioners/{practitioner_id}").status_code == 404
+    listing = client.get("/api/practitioners/", params={"limit": 500}).json()["items"]
+    assert practitioner_id not in [item["practitioner_id"] for item in listing]
+
+
+def test_signup_purges_the_listing_but_not_other_details(client: TestClient):
+    patient_id = _patient_id(client, "tagged-list@example.com")
+    client.get(f"/api/patients/{patient_id}")
+    client.get("/api/patients/")
+    assert _cached(client.get("/api/patients/"))
+
+    client.post("/api/patients/signup", json={"email": "tagged-list-new@example.com", "password": "secretpw"})
+    assert not _cached(client.get("/api/patients/"))
+    assert _cached(client.get(f"/api/patients/{patient_id}"))
+
+
+def test_hard_delete_purges_the_practitioner_detail(client: TestClient):
+    client.post("/api/practitioners/signup", json={"email": "tagged-doc@example.com", "password": "secretpw"})
+    practitioner_id = "PR-tagged-doc@example.com"
+    assert client.get(f"/api/practitioners/{practitioner_id}").status_code == 200
+    assert _cached(client.get(f"/api/practitioners/{practitioner_id}"))
+
+    async def delete():
+        async with AsyncSessionLocal() as db:
+            profile_id = (await db.execute(select(PractitionerProfile.id).where(PractitionerProfile.practitioner_id == practitioner_id))).scalar_one()
+            await hard_delete_practitioner_async(db, profile_id)
+
+    asyncio.run(delete())
+    assert client.get(f"/api/practitioners/{practitioner_id}").status_code == 404
+
+
+def test_rolled_back_writes_purge_nothing(client: TestClient):
+    patient_id = _patient_id(client, "tagged-rollback@example.com")
+    client.get(f"/api/patients/{patient_id}")
+
+    async def abandoned_write():
+        async with AsyncSessionLocal() as db:
+            await db.execute(select(PractitionerProfile.id))
+            tag_cache(db, f"patient:{patient_id}")
+            await db.rollback()
+            await db.commit()
+
+    asyncio.run(abandoned_write())
+    assert _cached(client.get(f"/api/patients/{patient_id}"))
+
+
+def test_sync_commits_off_the_loop_purge_locally_and_report_failures(monkeypatch, capsys):
+    backend = InMemoryCacheBackend(max_bytes=1024)
+    monkeypatch.setattr(CacheUtils, "backend", backend)
+    asyncio.run(backend.set("detail", "a", ttl=60, tags=("patient:1",)))
+
+    purge(("patient:1",))
+    assert asyncio.run(backend.get("detail")) == (None, None)
+
+    async def unreachable(tags):
+        raise ConnectionError("cache backend down")
+
+    monkeypatch.setattr(CacheUtils, "invalidate_tags_detached", unreachable)
+    purge(("patient:1",))  # the commit already happened; the failure is reported, not raised
+    assert "cache backend down" in capsys.readouterr().out
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.daos.patients import create_patient
+from app.daos.practitioners import create_practitioner
+from app.daos.users import get_user_by_email
+from app.exceptions import UserAlreadyExistsException
+from app.sessions.db import SessionLocal, get_engine
+
+
+@pytest.fixture
+def db():
+    get_engine()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def test_create_patient_returns_profile_without_refresh(db):
+    profile = create_patient(db, email="unit@example.com", password="secretpw", country="CountryX")
+    assert profile.id is not None
+    assert profile.user_id is not None
+    assert profile.country == "CountryX"
+
+    with pytest.raises(UserAlreadyExistsException):
+        create_patient(db, email="unit@example.com", password="secretpw")
+
+
+def test_failed_profile_insert_leaves_no_orphan_user(db):
+    create_practitioner(db, email="first-doc@example.com", password="secretpw", practitioner_id="PR-SHARED")
+    with pytest.raises(IntegrityError):
+        create_practitioner(db, email="second-doc@example.com", password="secretpw", practitioner_id="PR-SHARED")
+    assert get_user_by_email(db, "second-doc@example.com") is None
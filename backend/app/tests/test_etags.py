@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.models.patients import PatientProfile
+from app.routes.patients import patients as patient_routes
+from app.sessions.db import AsyncSessionLocal
+from app.utils.etags import etag_matches
+
+
+def _patient_id(client: TestClient, email: str) -> int:
+    client.post("/api/patients/signup", json={"email": email, "password": "secretpw", "first_name": "Etag"})
+    return client.get("/api/patients/search", params={"q": email.split("@")[0]}).json()["items"][0]["id"]
+
+
+def test_etag_comparison_is_weak_and_accepts_lists():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_detail_revalidation_checks_only_the_version(client: TestClient, monkeypatch):
+    patient_id = _patient_id(client, "etag-detail@example.com")
+    etag = client.get(f"/api/patients/{patient_id}").headers["etag"]
+    assert etag == f'"patient-{patient_id}-v1"'
+
+    loads = []
+    real = patient_routes.get_patient_by_id_async
+
+    async def counting(db, pid):
+        loads.append(pid)
+        return await real(db, pid)
+
+    monkeypatch.setattr(patient_routes, "get_patient_by_id_async", counting)
+    # no-cache skips the response cache, so the route itself answers
+    resp = client.get(f"/api/patients/{patient_id}", headers={"If-None-Match": etag, "Cache-Control": "no-cache"})
+    assert (resp.status_code, resp.content, resp.headers["etag"]) == (304, b"", etag)
+    assert loads == []
+
+    # cached entries answer revalidations too
+    assert client.get(f"/api/patients/{patient_id}", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_updates_change_the_detail_etag(client: TestClient):
+    patient_id = _patient_id(client, "etag-update@example.com")
+    etag = client.get(f"/api/patients/{patient_id}").headers["etag"]
+
+    async def update():
+        async with AsyncSessionLocal() as db:
+            profile = await db.get(PatientProfile, patient_id)
+            profile.country = "Kenya"
+            await db.commit()
+
+    asyncio.run(update())
+    resp = client.get(f"/api/patients/{patient_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["country"] == "Kenya"
+    assert resp.headers["etag"] == f'"patient-{patient_id}-v2"'
+
+
+def test_listing_etag_is_a_content_hash(client: TestClient):
+    _patient_id(client, "etag-list@example.com")
+    _patient_id(client, "etag-list-2@example.com")
+    etag = client.get("/api/patients/", params={"limit": 1}).headers["etag"]
+    assert client.get("/api/patients/", params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/patients/", params={"limit": 1}, headers={"If-None-Match": etag, "Cache-Control": "no-cache"}).status_code == 304
+    assert client.get("/api/patients/", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 200
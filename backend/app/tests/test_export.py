@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from app.daos.patients import soft_delete_patient_async
+from app.sessions.db import AsyncSessionLocal
+
+
+def test_patient_export_ndjson_and_csv(client: TestClient, internal_headers):
+    client.post("/api/patients/signup", json={"email": "export@example.com", "password": "secretpw", "first_name": "Ex", "country": "CountryX"})
+
+    resp = client.get("/api/patients/export", headers=internal_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in resp.text.splitlines()]
+    assert {"email": "export@example.com", "first_name": "Ex", "country": "CountryX"}.items() <= next(r for r in records if r["email"] == "export@example.com").items()
+
+    resp = client.get("/api/patients/export", params={"format": "csv"}, headers=internal_headers)
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == len(records)
+    assert any(row["email"] == "export@example.com" for row in rows)
+
+
+def test_practitioner_export_route_is_not_shadowed_by_detail(client: TestClient, internal_headers):
+    client.post("/api/practitioners/signup", json={"email": "export-doc@example.com", "password": "secretpw"})
+    resp = client.get("/api/practitioners/export", params={"format": "csv"}, headers=internal_headers)
+    assert resp.status_code == 200
+    assert "export-doc@example.com" in resp.text
+
+
+def test_export_needs_the_internal_token_and_skips_deleted_users(client: TestClient, internal_headers):
+    client.post("/api/patients/signup", json={"email": "export-gone@example.com", "password": "secretpw", "first_name": "Gone"})
+    patient_id = client.get("/api/patients/search", params={"q": "export-gone"}).json()["items"][0]["id"]
+
+    async def delete():
+        async with AsyncSessionLocal() as db:
+            await soft_delete_patient_async(db, patient_id)
+
+    asyncio.run(delete())
+    assert client.get("/api/patients/export").status_code == 403
+    assert client.get("/api/practitioners/export").status_code == 403
+    assert "export-gone@example.com" not in client.get("/api/patients/export", headers=internal_headers).text
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.daos.patients import soft_delete_patient_async
+from app.sessions.db import AsyncSessionLocal
+from app.utils import identity_cache
+from app.utils.identity_cache import UserAuthState, UserStateCache, load_user_state, user_states
+from app.utils.user_utils import get_current_active_user
+
+
+@pytest.fixture
+def lookups(monkeypatch) -> list[int]:
+    calls = []
+    real = identity_cache.get_user_auth_state_async
+
+    async def counting(db, user_id):
+        calls.append(user_id)
+        return await real(db, user_id)
+
+    monkeypatch.setattr(identity_cache, "get_user_auth_state_async", counting)
+    return calls
+
+
+@pytest.fixture
+def protected_client() -> TestClient:
+    app = FastAPI()
+
+    async def also_needs_user(request: Request, user: UserAuthState = Depends(get_current_active_user)):
+        # a second dependency loading the same user goes through the request-scoped cache
+        return await load_user_state(request, user.id)
+
+    @app.get("/me")
+    async def me(user: UserAuthState = Depends(get_current_active_user), again=Depends(also_needs_user)):
+        return {"id": user.id, "role": user.role, "same": again == user}
+
+    return TestClient(app)
+
+
+def _signup(client: TestClient, email: str) -> tuple[dict, int]:
+    tokens = client.post("/api/patients/signup", json={"email": email, "password": "secretpw"}).json()
+    patient_id = client.get("/api/patients/search", params={"q": email.split("@")[0]}).json()["items"][0]["id"]
+    return {"Authorization": f"Bearer {tokens['access_token']}"}, patient_id
+
+
+def test_user_loaded_once_per_request_and_cached_across_requests(client: TestClient, protected_client: TestClient, lookups):
+    auth, _ = _signup(client, "identity-cache@example.com")
+    for _ in range(3):
+        resp = protected_client.get("/me", headers=auth)
+        assert resp.status_code == 200
+        assert resp.json()["role"] == "patient" and resp.json()["same"]
+    assert len(lookups) == 1
+
+
+def test_soft_delete_invalidates_cached_state(client: TestClient, protected_client: TestClient, lookups):
+    auth, patient_id = _signup(client, "identity-deleted@example.com")
+    assert protected_client.get("/me", headers=auth).status_code == 200
+
+    async def delete():
+        async with AsyncSessionLocal() as db:
+            await soft_delete_patient_async(db, patient_id)
+
+    asyncio.run(delete())
+    resp = protected_client.get("/me", headers=auth)
+    assert (resp.status_code, resp.json()["detail"]) == (401, "User is inactive or deleted")
+    assert len(lookups) == 2
+
+
+def test_state_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(identity_cache.time, "monotonic", lambda: now[0])
+    cache = UserStateCache(ttl=5, max_entries=2)
+    for user_id in (1, 2, 3):
+        cache.put(UserAuthState(user_id, "patient", True, False))
+    assert cache.get(1) is None and cache.get(3).id == 3
+    now[0] += 6
+    assert cache.get(3) is None
+
+    disabled = UserStateCache(ttl=0, max_entries=2)
+    disabled.put(UserAuthState(1, "patient", True, False))
+    assert disabled.get(1) is None
+    assert user_states.ttl > 0
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from fastapi.testclient import TestClient
+
+from app.cli.rotate_jwt_key import main as rotate_jwt_key, write_key
+from app.constants import jwt_utils
+from app.constants.jwt_utils import KeyRing, create_access_token, create_refresh_token, verify_token
+from app.utils.jwks_verifier import JWKSVerifier
+
+
+@pytest.fixture
+def ed25519_ring(monkeypatch) -> KeyRing:
+    ring = KeyRing("EdDSA", {"2026-01": ed25519.Ed25519PrivateKey.generate(), "2026-02": ed25519.Ed25519PrivateKey.generate()}, "2026-02")
+    monkeypatch.setattr(jwt_utils, "ALGORITHM", "EdDSA")
+    monkeypatch.setattr(jwt_utils, "_key_ring", ring)
+    return ring
+
+
+def test_asymmetric_tokens_carry_the_active_kid(ed25519_ring):
+    token = create_access_token("12")
+    assert jwt.get_unverified_header(token) == {"alg": "EdDSA", "kid": "2026-02", "typ": "JWT"}
+    assert verify_token(token)["sub"] == "12"
+
+    retired = jwt.encode({"sub": "12"}, ed25519.Ed25519PrivateKey.generate(), algorithm="EdDSA", headers={"kid": "2025-12"})
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_token(retired)
+
+
+def test_jwks_endpoint_publishes_every_key(client: TestClient, ed25519_ring):
+    resp = client.get("/.well-known/jwks.json")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "public, max-age=300"
+    assert [(k["kid"], k["kty"], k["alg"]) for k in resp.json()["keys"]] == [("2026-01", "OKP", "EdDSA"), ("2026-02", "OKP", "EdDSA")]
+
+
+def test_hs256_publishes_no_keys(client: TestClient):
+    assert client.get("/.well-known/jwks.json").json() == {"keys": []}
+
+
+def test_verifier_fetches_once_and_refetches_on_rotation(client: TestClient, ed25519_ring, monkeypatch):
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return client.get("/.well-known/jwks.json").json()
+
+    verifier = JWKSVerifier(fetch=fetch, min_refresh_interval=0)
+    tokens = [create_access_token(str(n)) for n in range(5)]
+    assert [verifier.verify(t)["sub"] for t in tokens] == ["0", "1", "2", "3", "4"]
+    assert len(fetches) == 1
+
+    rotated = KeyRing("EdDSA", {"2026-02": ed25519_ring.signing_key, "2026-03": ed25519.Ed25519PrivateKey.generate()}, "2026-03")
+    monkeypatch.setattr(jwt_utils, "_key_ring", rotated)
+    assert verifier.verify(create_access_token("5"))["sub"] == "5"
+    assert len(fetches) == 2
+
+
+def test_verifier_accepts_only_access_tokens(client: TestClient, ed25519_ring):
+    verifier = JWKSVerifier(fetch=lambda: client.get("/.well-known/jwks.json").json())
+    refresh = create_refresh_token("7", "jti-1", "jti-1", datetime.utcnow() + timedelta(days=1))
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(refresh)
+    legacy = jwt.encode({"sub": "7"}, ed25519_ring.signing_key, algorithm="EdDSA", headers={"kid": ed25519_ring.active_kid})
+    assert verifier.verify(legacy)["sub"] == "7"
+
+
+def test_verifier_rate_limits_unknown_kids():
+    fetches = []
+    verifier = JWKSVerifier(fetch=lambda: fetches.append(1) or {"keys": []}, min_refresh_interval=60)
+    bogus = jwt.encode({"sub": "1"}, ed25519.Ed25519PrivateKey.generate(), algorithm="EdDSA", headers={"kid": "nope"})
+    for _ in range(3):
+        with pytest.raises(jwt.InvalidTokenError):
+            verifier.verify(bogus)
+    assert len(fetches) == 1
+
+
+def test_rotated_key_files_load_newest_as_active(tmp_path):
+    older = write_key(tmp_path, "RS256")
+    newer = tmp_path / "29990101T000000Z.pem"
+    newer.write_bytes(older.read_bytes())
+    ring = KeyRing.from_directory("RS256", str(tmp_path))
+    assert ring.active_kid == newer.stem
+    assert isinstance(ring.signing_key, rsa.RSAPrivateKey)
+    assert oct(older.stat().st_mode & 0o777) == "0o600"
+    with pytest.raises(ValueError):
+        KeyRing.from_directory("EdDSA", str(tmp_path))
+
+
+def test_rotation_adds_keys_verify_only_until_the_kid_is_switched(tmp_path):
+    rotate_jwt_key(["--keys-dir", str(tmp_path), "--algorithm", "EdDSA"])
+    (first,) = [path.stem for path in tmp_path.glob("*.pem")]
+    # without a pinned active kid the new key would take over on the next restart
+    with pytest.raises(SystemExit):
+        rotate_jwt_key(["--keys-dir", str(tmp_path), "--algorithm", "EdDSA"])
+
+    newer = tmp_path / "29990101T000000Z.pem"
+    newer.write_bytes((tmp_path / f"{first}.pem").read_bytes())
+    ring = KeyRing.from_directory("EdDSA", str(tmp_path), first)
+    assert ring.active_kid == first and set(ring.public_keys) == {first, newer.stem}
+
+    with pytest.raises(SystemExit):
+        rotate_jwt_key(["--keys-dir", str(tmp_path), "--active-kid", first, "--keep", "1"])
+    rotate_jwt_key(["--keys-dir", str(tmp_path), "--active-kid", newer.stem, "--keep", "1"])
+    assert [path.stem for path in tmp_path.glob("*.pem")] == [newer.stem]
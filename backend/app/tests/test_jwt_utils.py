@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.constants import jwt_utils
+from app.constants.jwt_utils import VerifiedClaimsCache, create_access_token, decode_access_token
+from app.utils.user_utils import get_current_user
+
+
+@pytest.fixture
+def protected_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/users/{user_id}/secret")
+    async def secret(user_id: int, claims: dict = Depends(get_current_user)):
+        return {"sub": claims["sub"]}
+
+    return TestClient(app)
+
+
+def test_repeated_decodes_skip_verification(monkeypatch):
+    token = create_access_token("41")
+    calls = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(jwt_utils.jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+    claims = [decode_access_token(token) for _ in range(3)]
+    assert [c["sub"] for c in claims] == ["41"] * 3
+    assert len(calls) == 1
+    claims[0]["sub"] = "tampered"
+    assert decode_access_token(token)["sub"] == "41"
+
+
+def test_cache_entries_expire_with_the_token():
+    cache = VerifiedClaimsCache(max_entries=2, ttl=300)
+    cache.put("expired", {"sub": "1", "exp": time.time() - 1})
+    cache.put("a", {"sub": "2"})
+    cache.put("b", {"sub": "3"})
+    cache.put("c", {"sub": "4"})
+    assert cache.get("expired") is None
+    assert cache.get("a") is None  # evicted, least recently used
+    assert cache.get("c") == {"sub": "4"}
+
+
+def test_expired_and_forged_tokens_are_rejected():
+    expired = create_access_token("7", expires_delta=timedelta(seconds=-1))
+    forged = jwt.encode({"sub": "7"}, "not-the-secret", algorithm="HS256")
+    for token, detail in ((expired, "Token expired"), (forged, "Invalid token")):
+        with pytest.raises(HTTPException) as exc:
+            decode_access_token(token)
+        assert (exc.value.status_code, exc.value.detail) == (401, detail)
+
+
+def test_get_current_user_dependency(protected_client: TestClient):
+    token = create_access_token("5")
+    assert protected_client.get("/users/5/secret").status_code == 401
+    assert protected_client.get("/users/6/secret", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    resp = protected_client.get("/users/5/secret", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert resp.json() == {"sub": "5"}
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.utils.login_throttle import LocalFailureStore, LoginThrottle
+
+
+@pytest.fixture
+def throttle(monkeypatch) -> LoginThrottle:
+    fresh = LoginThrottle(email_threshold=2, ip_threshold=4, base_delay=30, max_delay=300, window=900, max_keys=100)
+    for module in ("app.routes.patients.patients", "app.routes.practitioners.practitioners"):
+        monkeypatch.setattr(f"{module}.login_throttle", fresh)
+    return fresh
+
+
+def test_lockout_grows_exponentially_up_to_the_cap():
+    throttle = LoginThrottle(email_threshold=3, ip_threshold=10, base_delay=1, max_delay=60, window=900, max_keys=10)
+    assert [throttle.lockout_seconds(n, 3) for n in (0, 2, 3, 4, 5, 9, 20)] == [0, 0, 1, 2, 4, 60, 60]
+
+
+def test_local_store_evicts_least_recently_used():
+    store = LocalFailureStore(max_keys=2, window=900)
+
+    async def scenario():
+        for key in ("a", "b", "a", "c"):
+            await store.reserve(key, threshold=10, base_delay=1, max_delay=60, ttl=60)
+            await store.settle(key, failed=True, ttl=60)
+        return [store._entries[key][0] if key in store._entries else 0 for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [2, 0, 1]
+
+
+def test_concurrent_attempts_count_before_the_password_is_checked():
+    throttle = LoginThrottle(email_threshold=2, ip_threshold=100, base_delay=30, max_delay=300, window=900, max_keys=100)
+
+    async def attempt(n):
+        try:
+            await throttle.check("burst@example.com", f"10.0.0.{n}")
+        except HTTPException:
+            return "locked"
+        await asyncio.sleep(0.01)  # the password check
+        await throttle.record_failure("burst@example.com", f"10.0.0.{n}")
+        return "checked"
+
+    async def scenario():
+        return await asyncio.gather(*[attempt(n) for n in range(10)])
+
+    assert sorted(asyncio.run(scenario())) == ["checked"] * 2 + ["locked"] * 8
+
+
+def test_released_attempts_do_not_count_as_failures():
+    throttle = LoginThrottle(email_threshold=1, ip_threshold=100, base_delay=30, max_delay=300, window=900, max_keys=100)
+
+    async def scenario():
+        await throttle.check("error@example.com", "10.0.0.1")
+        await throttle.release("error@example.com", "10.0.0.1")
+        await throttle.check("error@example.com", "10.0.0.1")
+
+    asyncio.run(scenario())
+
+
+def test_locked_out_email_is_rejected_before_hashing(client: TestClient, throttle, monkeypatch):
+    email = "throttle-email@example.com"
+    assert client.post("/api/patients/signup", json={"email": email, "password": "secretpw"}).status_code == 201
+    for _ in range(2):
+        assert client.post("/api/patients/login", json={"email": email, "password": "wrong"}).status_code == 401
+
+    async def must_not_run(*args, **kwargs):
+        raise AssertionError("password verified while locked out")
+
+    monkeypatch.setattr("app.routes.patients.patients.authenticate_user_async", must_not_run)
+    resp = client.post("/api/patients/login", json={"email": email, "password": "secretpw"})
+    assert resp.status_code == 429
+    assert 0 < int(resp.headers["retry-after"]) <= 30
+
+
+def test_success_resets_email_counter(client: TestClient, throttle):
+    email = "throttle-reset@example.com"
+    client.post("/api/patients/signup", json={"email": email, "password": "secretpw"})
+    for password in ("wrong", "secretpw", "wrong", "secretpw"):
+        assert client.post("/api/patients/login", json={"email": email, "password": password}).status_code != 429
+
+
+def test_ip_is_locked_out_across_emails(client: TestClient, throttle):
+    for n in range(4):
+        client.post("/api/practitioners/login", json={"email": f"stuffing{n}@example.com", "password": "guess"})
+    resp = client.post("/api/practitioners/login", json={"email": "someone-else@example.com", "password": "guess"})
+    assert resp.status_code == 429
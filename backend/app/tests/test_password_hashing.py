@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.users import User
+from app.sessions import db as db_module
+from app.utils.auth import build_password_context, pwd_context
+
+
+def _stored_hash(email: str) -> str:
+    with db_module.SessionLocal(bind=db_module.get_engine()) as db:
+        return db.query(User).filter(User.email == email).one().hashed_password
+
+
+def _set_hash(email: str, hashed: str) -> None:
+    with db_module.SessionLocal(bind=db_module.get_engine()) as db:
+        db.query(User).filter(User.email == email).update({User.hashed_password: hashed})
+        db.commit()
+
+
+@pytest.mark.parametrize(
+    "legacy",
+    [
+        build_password_context("bcrypt", bcrypt_rounds=4),
+        build_password_context("argon2", argon2_time_cost=1, argon2_memory_cost=1024, argon2_parallelism=1),
+    ],
+    ids=["cheap-bcrypt", "argon2"],
+)
+def test_login_upgrades_outdated_hash(client: TestClient, legacy):
+    email = f"rehash-{legacy.default_scheme()}@example.com"
+    assert client.post("/api/patients/signup", json={"email": email, "password": "secretpw"}).status_code == 201
+    _set_hash(email, legacy.hash("secretpw"))
+    assert pwd_context.needs_update(_stored_hash(email))
+
+    assert client.post("/api/patients/login", json={"email": email, "password": "secretpw"}).status_code == 200
+    upgraded = _stored_hash(email)
+    assert not pwd_context.needs_update(upgraded)
+    assert pwd_context.verify("secretpw", upgraded)
+
+
+def test_failed_login_leaves_hash_alone(client: TestClient):
+    email = "rehash-wrongpw@example.com"
+    client.post("/api/patients/signup", json={"email": email, "password": "secretpw"})
+    legacy_hash = build_password_context("bcrypt", bcrypt_rounds=4).hash("secretpw")
+    _set_hash(email, legacy_hash)
+
+    assert client.post("/api/patients/login", json={"email": email, "password": "nope"}).status_code == 401
+    assert _stored_hash(email) == legacy_hash
+
+
+def test_unknown_scheme_is_rejected():
+    with pytest.raises(ValueError):
+        build_password_context("md5_crypt")
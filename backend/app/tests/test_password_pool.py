@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.utils.auth import password_pool
+from app.utils.process_pool import BoundedProcessPool, PoolSaturatedError
+
+
+def test_pool_rejects_work_past_max_pending():
+    pool = BoundedProcessPool(max_workers=1, max_pending=1)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(time.sleep, 0)
+        await first
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert (pool.pending, pool.rejected) == (0, 1)
+
+
+def test_cancelled_callers_keep_their_slot_until_the_job_ends():
+    pool = BoundedProcessPool(max_workers=1, max_pending=1)
+
+    async def scenario():
+        waiter = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0.2)  # the worker has picked the job up
+        waiter.cancel()
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(time.sleep, 0)
+        while pool.pending:
+            await asyncio.sleep(0.05)
+        await pool.run(time.sleep, 0)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert pool.pending == 0
+
+
+def test_saturated_password_pool_returns_503(client: TestClient, monkeypatch):
+    monkeypatch.setattr(password_pool, "max_pending", 0)
+    resp = client.post("/api/patients/signup", json={"email": "busy@example.com", "password": "secretpw"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+
+def test_csv_import_reports_bad_rows_without_aborting(client: TestClient, internal_headers):
+    client.post("/api/patients/signup", json={"email": "already@example.com", "password": "secretpw"})
+    body = "\n".join([
+        "email,password,first_name,country",
+        "bulk1@example.com,secretpw,Ada,CountryX",
+        "not-an-email,secretpw,Bad,",
+        "already@example.com,secretpw,Dup,",
+        "bulk1@example.com,secretpw,Again,",
+        "bulk2@example.com,secretpw,Bea,",
+    ])
+    resp = client.post("/api/patients/import", content=body, headers={**internal_headers, "Content-Type": "text/csv"})
+    assert resp.status_code == 200
+    report = resp.json()
+    assert (report["rows"], report["imported"], report["failed"]) == (5, 2, 3)
+    assert sorted(error["row"] for error in report["errors"]) == [3, 4, 5]
+
+    login = client.post("/api/patients/login", json={"email": "bulk2@example.com", "password": "secretpw"})
+    assert login.status_code == 200
+
+
+def test_ndjson_import(client: TestClient, internal_headers):
+    lines = [json.dumps({"email": f"nd{i}@example.com", "password": "secretpw", "province": "P"}) for i in range(3)]
+    resp = client.post("/api/patients/import", content="\n".join(lines + ["{broken"]), headers={**internal_headers, "Content-Type": "application/x-ndjson"})
+    report = resp.json()
+    assert (report["rows"], report["imported"], report["failed"]) == (4, 3, 1)
+    assert [error["row"] for error in report["errors"]] == [4]
+
+
+def test_import_needs_the_internal_token(client: TestClient, internal_headers):
+    body = "email,password\nnoauth@example.com,secretpw"
+    assert client.post("/api/patients/import", content=body).status_code == 403
+    assert client.post("/api/patients/import", content=body, headers={"X-Internal-Token": "wrong"}).status_code == 403
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.utils.pagination import encode_cursor
+
+
+def _signup(client: TestClient, email: str, first_name: str, last_name: str):
+    resp = client.post("/api/patients/signup", json={"email": email, "password": "secretpw", "first_name": first_name, "last_name": last_name})
+    assert resp.status_code == 201
+
+
+def test_search_ranks_prefix_matches_before_substring_matches(client: TestClient):
+    _signup(client, "marguerite.ng@example.com", "Marguerite", "Ng")
+    _signup(client, "zed.amargo@example.com", "Zed", "Amargo")
+
+    emails = [item["email"] for item in client.get("/api/patients/search", params={"q": "marg"}).json()["items"]]
+    assert emails.index("marguerite.ng@example.com") < emails.index("zed.amargo@example.com")
+
+
+def test_search_matches_every_word_and_pages_with_cursor(client: TestClient):
+    for i in range(3):
+        _signup(client, f"searchpage{i}@example.com", "Quentin", f"Searchpage{i}")
+
+    assert [item["email"] for item in client.get("/api/patients/search", params={"q": "quentin searchpage1"}).json()["items"]] == ["searchpage1@example.com"]
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "quentin", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/patients/search", params=params).json()
+        seen.extend(item["email"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == [f"searchpage{i}@example.com" for i in range(3)]
+
+
+def test_search_treats_like_wildcards_literally(client: TestClient):
+    _signup(client, "wild@example.com", "Wild", "Card")
+    assert client.get("/api/patients/search", params={"q": "%"}).json()["items"] == []
+
+
+def test_forged_search_cursors_are_rejected(client: TestClient):
+    for forged in ({"rank": "0", "id": 1}, {"rank": {"x": 1}, "id": 1}, {"rank": 7, "id": 1}, {"rank": 1, "id": "1"}):
+        assert client.get("/api/patients/search", params={"q": "quentin", "cursor": encode_cursor(forged)}).status_code == 400
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+
+from app.config.base import settings
+from app.sessions.pool_stats import InstrumentedQueuePool, register_engine
+
+
+def test_pool_stats_count_checkouts_and_timeouts():
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.01)
+    conn = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    snapshot = engine.pool.snapshot()
+    assert snapshot["checked_out"] == 1
+    assert snapshot["checkouts"] == 1
+    assert snapshot["checkout_timeouts"] == 1
+    assert snapshot["wait_time_ms"]["le_inf"] == 1
+
+    conn.close()
+    engine.dispose()
+    # counters survive the pool being recreated
+    assert engine.pool.snapshot()["checkout_timeouts"] == 1
+
+
+def test_db_pool_endpoint(client: TestClient, internal_headers):
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool)
+    register_engine("test", engine)
+    with engine.connect():
+        resp = client.get("/internal/db-pool", headers=internal_headers)
+    assert resp.status_code == 200
+    assert resp.json()["test"]["checked_out"] == 1
+
+
+def test_internal_routes_fail_closed(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", None)
+    assert client.get("/internal/db-pool").status_code == 404
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal-test-token")
+    assert client.get("/internal/db-pool").status_code == 403
+    assert client.get("/internal/db-pool", headers={"X-Internal-Token": "wrong"}).status_code == 403
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+import redis.asyncio as aioredis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+
+from app.constants.jwt_utils import create_access_token, create_refresh_token
+from app.middlewares import rate_limiter_middleware
+from app.middlewares.rate_limiter_middleware import LocalRateLimitStore, RateLimit, RateLimitMiddleware, RateLimitRule
+
+
+def _limited_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/login")
+    async def login():
+        return {"ok": True}
+
+    rules = [
+        RateLimitRule("login", r"/login", RateLimit(2, 60), methods=("POST",)),
+        RateLimitRule("default", r"/.*", RateLimit(3, 60), user_limit=RateLimit(5, 60)),
+    ]
+    app.add_middleware(RateLimitMiddleware, rules=rules)
+    return TestClient(app)
+
+
+def test_gcra_allows_a_burst_then_one_request_per_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter_middleware.time, "monotonic", lambda: now[0])
+    store = LocalRateLimitStore(max_keys=10)
+    limit = RateLimit.parse("3/30")
+
+    def hit():
+        return asyncio.run(store.hit("k", limit.interval_ms, limit.tolerance_ms))
+
+    assert [hit() for _ in range(4)] == [(True, 0, 2), (True, 0, 1), (True, 0, 0), (False, 10_000, 0)]
+    now[0] += 10  # one interval later, exactly one more request fits
+    assert hit() == (True, 0, 0)
+    assert hit()[0] is False
+
+
+def test_anonymous_callers_are_limited_per_ip_and_per_route():
+    client = _limited_client()
+    statuses = [client.get("/ping").status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+    denied = client.get("/ping")
+    assert int(denied.headers["retry-after"]) > 0
+    # the login rule has its own budget
+    assert [client.post("/login").status_code for _ in range(3)] == [200, 200, 429]
+
+
+def test_authenticated_users_get_their_own_budget():
+    client = _limited_client()
+    for _ in range(3):
+        client.get("/ping")
+    assert client.get("/ping").status_code == 429
+
+    alice = {"Authorization": f"Bearer {create_access_token('101')}"}
+    responses = [client.get("/ping", headers=alice) for _ in range(6)]
+    assert [r.status_code for r in responses] == [200] * 5 + [429]
+    assert responses[0].headers["x-ratelimit-limit"] == "5"
+    assert responses[0].headers["x-ratelimit-remaining"] == "4"
+    # a forged token, or a refresh token, falls back to the (exhausted) IP budget
+    assert client.get("/ping", headers={"Authorization": "Bearer forged"}).status_code == 429
+    refresh = create_refresh_token("101", "jti-1", "jti-1", datetime.utcnow() + timedelta(days=1))
+    assert client.get("/ping", headers={"Authorization": f"Bearer {refresh}"}).status_code == 429
+
+
+def test_unreachable_redis_falls_back_to_local_limits(monkeypatch):
+    unreachable = aioredis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2, retry=Retry(NoBackoff(), 0))
+
+    async def get_redis_pool():
+        return unreachable
+
+    monkeypatch.setattr(rate_limiter_middleware, "get_redis_pool", get_redis_pool)
+    client = _limited_client()
+    assert [client.get("/ping").status_code for _ in range(4)] == [200, 200, 200, 429]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from app.models.users import User
+from app.sessions.routing import ReadYourWritesTracker, RoutingSession
+
+
+def _session(**info) -> RoutingSession:
+    primary = create_engine("sqlite://", poolclass=StaticPool)
+    replica = create_engine("sqlite://", poolclass=StaticPool)
+    session = RoutingSession(bind=primary, info={"replica": replica, **info})
+    return session
+
+
+def test_read_only_session_selects_from_replica():
+    session = _session(read_only=True)
+    assert session.get_bind(clause=select(User)) is session.info["replica"]
+
+
+def test_default_and_sticky_sessions_stay_on_primary():
+    for session in (_session(), _session(read_only=True, sticky_primary=True), _session(read_only=True, wrote=True)):
+        assert session.get_bind(clause=select(User)) is session.bind
+
+
+def test_read_your_writes_window():
+    tracker = ReadYourWritesTracker(window=60)
+    assert not tracker.recently_wrote("user:1")
+    tracker.mark_write("user:1")
+    assert tracker.recently_wrote("user:1")
+    assert not tracker.recently_wrote("user:2")
+
+    expired = ReadYourWritesTracker(window=0)
+    expired.mark_write("user:1")
+    assert not expired.recently_wrote("user:1")
+
+
+def test_committed_write_starts_stickiness_window(client):
+    from app.sessions.routing import read_your_writes
+
+    resp = client.post("/api/patients/signup", json={"email": "sticky@example.com", "password": "secretpw"})
+    assert resp.status_code == 201
+    assert read_your_writes.recently_wrote("ip:testclient")
+
+
+def test_principal_comes_from_access_tokens_only():
+    from datetime import datetime, timedelta
+
+    from starlette.requests import Request
+
+    from app.constants.jwt_utils import create_access_token, create_refresh_token
+    from app.sessions.routing import request_principal
+
+    def request(token: str) -> Request:
+        return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.9", 1)})
+
+    assert request_principal(request(create_access_token("42"))) == "user:42"
+    refresh = create_refresh_token("42", "jti-1", "jti-1", datetime.utcnow() + timedelta(days=1))
+    assert request_principal(request(refresh)) == "ip:10.0.0.9"
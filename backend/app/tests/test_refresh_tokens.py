@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.constants.jwt_utils import create_access_token, verify_token
+from app.daos.patients import soft_delete_patient_async
+from app.sessions.db import AsyncSessionLocal
+from app.utils.token_revocation import BloomFilter, RevocationFilter, revoked_access_tokens
+from app.utils.user_utils import get_current_user
+
+
+def _signup(client: TestClient, email: str) -> dict:
+    resp = client.post("/api/patients/signup", json={"email": email, "password": "secretpw"})
+    assert resp.status_code == 201
+    return resp.json()
+
+
+@pytest.fixture
+def protected_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(claims: dict = Depends(get_current_user)):
+        return {"sub": claims["sub"]}
+
+    return TestClient(app)
+
+
+def test_refresh_rotates_and_detects_reuse(client: TestClient):
+    first = _signup(client, "refresh-rotate@example.com")
+    assert first["refresh_token"]
+
+    second = client.post("/api/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert second.status_code == 200
+    rotated = second.json()
+    assert rotated["refresh_token"] != first["refresh_token"]
+
+    # replaying the spent token revokes the whole family, including the token that replaced it
+    assert client.post("/api/auth/refresh", json={"refresh_token": first["refresh_token"]}).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+    # a fresh login starts a new, unaffected family
+    login = client.post("/api/patients/login", json={"email": "refresh-rotate@example.com", "password": "secretpw"}).json()
+    assert client.post("/api/auth/refresh", json={"refresh_token": login["refresh_token"]}).status_code == 200
+
+
+def test_token_types_are_not_interchangeable(client: TestClient, protected_client: TestClient):
+    tokens = _signup(client, "refresh-types@example.com")
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+    assert protected_client.get("/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}).status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client: TestClient, protected_client: TestClient):
+    tokens = _signup(client, "refresh-logout@example.com")
+    auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert protected_client.get("/me", headers=auth).status_code == 200
+
+    assert client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=auth).status_code == 204
+    resp = protected_client.get("/me", headers=auth)
+    assert (resp.status_code, resp.json()["detail"]) == (401, "Token revoked")
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_logout_with_an_expired_access_token_still_ends_the_session(client: TestClient):
+    tokens = _signup(client, "refresh-expired-logout@example.com")
+    sub = verify_token(tokens["access_token"])["sub"]
+    expired = {"Authorization": f"Bearer {create_access_token(sub, timedelta(minutes=-5))}"}
+    assert client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=expired).status_code == 204
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_other_processes_learn_revocations_on_sync(client: TestClient):
+    tokens = _signup(client, "refresh-sync@example.com")
+    auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+    client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=auth)
+    jti = verify_token(tokens["access_token"])["jti"]
+    assert revoked_access_tokens.might_be_revoked(jti)
+
+    other_process = RevocationFilter(capacity=100, fp_rate=0.001)
+    assert not other_process.might_be_revoked(jti)
+    asyncio.run(other_process.sync())
+    assert other_process.might_be_revoked(jti)
+    assert asyncio.run(other_process.is_revoked(jti))
+
+
+def test_soft_delete_revokes_refresh_tokens(client: TestClient):
+    tokens = _signup(client, "refresh-deleted@example.com")
+    patient_id = client.get("/api/patients/search", params={"q": "refresh-deleted"}).json()["items"][0]["id"]
+
+    async def delete():
+        async with AsyncSessionLocal() as db:
+            assert await soft_delete_patient_async(db, patient_id)
+
+    asyncio.run(delete())
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+    members = [f"jti-{n}" for n in range(1000)]
+    for jti in members:
+        bloom.add(jti)
+    assert all(jti in bloom for jti in members)
+    false_positives = sum(f"other-{n}" in bloom for n in range(10_000))
+    assert false_positives < 300
+    assert len(bloom.bits) < 1300  # ~9.6 bits per entry at 1%
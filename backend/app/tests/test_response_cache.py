@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+import jwt
+import redis.asyncio as aioredis
+from fastapi.testclient import TestClient
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+
+from app.constants.jwt_utils import create_access_token, create_refresh_token
+from app.middlewares.cache_middleware import pack_entry
+from app.routes.patients import patients as patient_routes
+from app.wrappers import cache_wrappers
+from app.wrappers.cache_keys import CachedEndpoint, build_cache_key
+from app.wrappers.cache_wrappers import InMemoryCacheBackend, RedisCacheBackend
+
+
+def test_memory_backend_evicts_by_size_and_expires(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache_wrappers.time, "monotonic", lambda: now[0])
+    backend = InMemoryCacheBackend(max_bytes=30)
+
+    async def scenario():
+        await backend.set("a", "x" * 10, ttl=60)
+        await backend.set("b", "y" * 10, ttl=5)
+        await backend.get("a")  # a is now the most recently used
+        await backend.set("c", "z" * 10, ttl=60)  # over 30 bytes: b goes
+        await backend.set("huge", "h" * 100, ttl=60)  # never fits, never stored
+        hits = [(await backend.get(key))[0] is not None for key in ("a", "b", "c", "huge")]
+        now[0] = 61
+        expired = await backend.get("a")
+        return hits, expired
+
+    hits, expired = asyncio.run(scenario())
+    assert hits == [True, False, True, False]
+    assert expired == (None, None)
+    assert backend.size == len("c") + 10
+
+
+def test_redis_backend_degrades_to_misses_when_unreachable():
+    backend = RedisCacheBackend(aioredis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2, retry=Retry(NoBackoff(), 0)))
+
+    async def scenario():
+        await backend.set("k", "v", ttl=60)
+        return await backend.get("k")
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_detail_and_listing_responses_are_cached(client: TestClient, monkeypatch):
+    for email in ("cached-detail@example.com", "cached-other@example.com"):
+        client.post("/api/patients/signup", json={"email": email, "password": "secretpw", "first_name": "Cached"})
+    patient_id = client.get("/api/patients/search", params={"q": "cached-detail"}).json()["items"][0]["id"]
+
+    calls = []
+    real = patient_routes.get_patient_by_id_async
+
+    async def counting(db, pid):
+        calls.append(pid)
+        return await real(db, pid)
+
+    monkeypatch.setattr(patient_routes, "get_patient_by_id_async", counting)
+    first = client.get(f"/api/patients/{patient_id}")
+    second = client.get(f"/api/patients/{patient_id}")
+    assert first.json() == second.json()
+    assert len(calls) == 1
+    assert second.headers["cache-control"].startswith("max-age=")
+
+    client.get(f"/api/patients/{patient_id}", headers={"Cache-Control": "no-cache"})
+    assert len(calls) == 2
+
+    # the query string is part of the key
+    assert client.get("/api/patients/", params={"limit": 1}).json() != client.get("/api/patients/", params={"limit": 2}).json()
+
+
+def test_routes_outside_the_list_are_not_cached(client: TestClient):
+    client.get("/api/patients/export")
+    backend = asyncio.run(cache_wrappers.CacheUtils.get_backend())
+    assert not any("export" in key for key in backend._entries)
+
+
+def _streaming_app(chunks: list[bytes], max_body_bytes: int):
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    from app.middlewares.cache_middleware import CacheMiddleware
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter(chunks), media_type="application/json")
+
+    app.add_middleware(CacheMiddleware, cached_endpoints=[r"/stream"], max_body_bytes=max_body_bytes)
+    return TestClient(app)
+
+
+def test_multi_chunk_bodies_are_cached_whole():
+    client = _streaming_app([b'{"a": ', b"[1, 2, ", b"3]}"], max_body_bytes=1024)
+    assert client.get("/stream").content == b'{"a": [1, 2, 3]}'
+    cached = client.get("/stream")
+    assert cached.content == b'{"a": [1, 2, 3]}'
+    assert cached.headers["content-length"] == "16"
+    assert cached.headers["cache-control"].startswith("max-age=")
+
+
+def test_bodies_over_the_limit_pass_through_uncached():
+    chunks = [b"x" * 600, b"y" * 600]
+    client = _streaming_app(chunks, max_body_bytes=1000)
+    assert client.get("/stream").content == b"".join(chunks)
+    backend = asyncio.run(cache_wrappers.CacheUtils.get_backend())
+    assert not any(key.startswith("/stream") for key in backend._entries)
+
+
+def _scope(query: bytes = b"", token: str | None = None, **headers: str) -> dict:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    if token:
+        raw.append((b"authorization", f"Bearer {token}".encode()))
+    return {"type": "http", "path": "/api/things", "query_string": query, "headers": raw}
+
+
+def test_cache_key_normalizes_the_query_string():
+    end_point = CachedEndpoint(r"/api/things", per_user=False)
+    assert build_cache_key(end_point, _scope(b"limit=5&cursor=abc&tag=b&tag=a")) == build_cache_key(end_point, _scope(b"tag=a&cursor=abc&limit=5&tag=b"))
+    assert build_cache_key(end_point, _scope(b"limit=5")) != build_cache_key(end_point, _scope(b"limit=6"))
+
+
+def test_cache_key_scopes_by_verified_principal_not_token():
+    end_point = CachedEndpoint(r"/api/things")
+    first, second, other = create_access_token("1"), create_access_token("1"), create_access_token("2")
+    forged = jwt.encode({"sub": "1"}, "not-the-secret", algorithm="HS256")
+
+    key = build_cache_key(end_point, _scope(token=first))
+    assert key == build_cache_key(end_point, _scope(token=second))
+    assert key != build_cache_key(end_point, _scope(token=other))
+    assert key != build_cache_key(end_point, _scope(token=forged))
+    assert build_cache_key(end_point, _scope(token=forged)) == build_cache_key(end_point, _scope())
+    assert first not in key
+    # a refresh token is no credential for reads: it shares the anonymous entry
+    refresh = create_refresh_token("1", "jti-1", "jti-1", datetime.utcnow() + timedelta(days=1))
+    assert build_cache_key(end_point, _scope(token=refresh)) == build_cache_key(end_point, _scope())
+
+
+def test_public_entries_are_shared_and_vary_headers_split_them():
+    end_point = CachedEndpoint(r"/api/things", per_user=False, vary=("Accept-Language",))
+    shared = build_cache_key(end_point, _scope(token=create_access_token("1"), accept_language="en"))
+    assert shared == build_cache_key(end_point, _scope(token=create_access_token("2"), accept_language="en"))
+    assert shared != build_cache_key(end_point, _scope(accept_language="fr"))
+    assert end_point.vary_header() == "accept-language"
+    assert CachedEndpoint(r"/x").vary_header() == "authorization"
+
+
+def _slow_app(calls: list[int]):
+    from fastapi import FastAPI
+
+    from app.middlewares.cache_middleware import CacheMiddleware
+
+    app = FastAPI()
+
+    @app.get("/roster")
+    async def roster():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"version": len(calls)}
+
+    app.add_middleware(CacheMiddleware, cached_endpoints=[CachedEndpoint(r"/roster", per_user=False)])
+    return app
+
+
+async def _get_concurrently(app, n: int) -> list:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        return await asyncio.gather(*(http.get("/roster") for _ in range(n)))
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+    responses = asyncio.run(_get_concurrently(_slow_app(calls), 5))
+    assert len(calls) == 1
+    assert {r.json()["version"] for r in responses} == {1}
+
+
+def test_stale_entry_is_served_while_one_request_refreshes():
+    calls = []
+    app = _slow_app(calls)
+    key = build_cache_key(CachedEndpoint(r"/roster", per_user=False), {"type": "http", "path": "/roster", "query_string": b"", "headers": []})
+
+    async def scenario():
+        await cache_wrappers.CacheUtils.create_cache(pack_entry('{"version": 0}', -1), key, 30)
+        return await _get_concurrently(app, 4)
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert sorted((r.headers.get("x-cache", "MISS"), r.json()["version"]) for r in responses) == [("MISS", 1), ("STALE", 0), ("STALE", 0), ("STALE", 0)]
+
+
+def test_waits_for_another_worker_holding_the_lock(monkeypatch):
+    class LockedElsewhere(InMemoryCacheBackend):
+        async def acquire_lock(self, key, ttl):
+            return None
+
+    backend = LockedElsewhere(max_bytes=1024)
+    monkeypatch.setattr(cache_wrappers.CacheUtils, "backend", backend)
+    calls = []
+    app = _slow_app(calls)
+    key = build_cache_key(CachedEndpoint(r"/roster", per_user=False), {"type": "http", "path": "/roster", "query_string": b"", "headers": []})
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        await backend.set(key, pack_entry('{"version": 42}', 60), 60)
+
+    async def scenario():
+        worker = asyncio.ensure_future(other_worker())
+        responses = await _get_concurrently(app, 2)
+        await worker
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert calls == []
+    assert [r.json()["version"] for r in responses] == [42, 42]
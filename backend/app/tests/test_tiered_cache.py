@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.wrappers.cache_bus import InvalidationBus
+from app.wrappers.cache_wrappers import InMemoryCacheBackend, TieredCacheBackend
+
+
+class LocalBus(InvalidationBus):
+    """Fan-out between backends in one process, standing in for Redis pub/sub."""
+
+    name = "local"
+
+    def __init__(self, subscribers: list) -> None:
+        super().__init__()
+        self.subscribers = subscribers
+
+    async def publish(self, message: dict) -> None:
+        for bus, handle in self.subscribers:
+            await bus.dispatch(self.encode(message), handle)
+
+    async def listen(self, handle, on_subscribe) -> None:
+        self.subscribers.append((self, handle))
+        await on_subscribe()
+
+
+def _workers(n: int, with_l2: bool = True) -> list[TieredCacheBackend]:
+    shared = InMemoryCacheBackend(max_bytes=4096) if with_l2 else None
+    subscribers: list = []
+    workers = [TieredCacheBackend(InMemoryCacheBackend(max_bytes=1024), shared, LocalBus(subscribers)) for _ in range(n)]
+    for worker in workers:
+        asyncio.run(worker.listen())
+    return workers
+
+
+def test_l1_serves_repeat_hits_without_touching_l2():
+    first, second = _workers(2)
+
+    async def scenario():
+        await first.set("k", "body", 60, ("patient:1",))
+        for _ in range(3):
+            assert (await second.get("k"))[0] == "body"
+
+    asyncio.run(scenario())
+    assert second.stats()["l1"]["hits"] == 2 and second.stats()["l1"]["misses"] == 1
+    assert second.l2.hits == 1
+    # the copy pulled from L2 kept its tags
+    assert second.l1._tagged == {"patient:1": {"k"}}
+
+
+def test_purges_reach_every_workers_l1():
+    first, second = _workers(2)
+
+    async def scenario():
+        await first.set("detail", "a", 60, ("patient:1",))
+        await first.set("other", "b", 60, ("patient:2",))
+        await second.get("detail"), await second.get("other")
+        await first.invalidate_tags(("patient:1",))
+        return [(await second.l1.get(key))[0] for key in ("detail", "other")], await second.get("detail")
+
+    l1_values, refetched = asyncio.run(scenario())
+    assert l1_values == [None, "b"]
+    assert refetched == (None, None)
+
+
+def test_l1_only_workers_stay_coherent_and_refuse_racing_writes():
+    first, second = _workers(2, with_l2=False)
+
+    async def scenario():
+        await second.set("listing", "old", 60, ("patients:list",))
+        versions = await second.tag_versions(("patients:list",))
+        await first.invalidate_tags(("patients:list",))
+        # second computed "stale" before hearing of the purge; it must not be cached
+        stored = await second.set("listing", "stale", 60, ("patients:list",), versions)
+        return stored, await second.get("listing")
+
+    assert asyncio.run(scenario()) == (False, (None, None))
+
+
+def test_stats_endpoint_reports_tiers(client: TestClient, internal_headers):
+    client.get("/api/patients/")
+    client.get("/api/patients/")
+    stats = client.get("/internal/response-cache", headers=internal_headers).json()
+    assert stats["memory"]["hits"] >= 1 and stats["memory"]["misses"] >= 1
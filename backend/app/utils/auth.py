@@ -1,34 +1,94 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import itertools
 
-import jwt
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-import os
 from app.config.base import settings
+from app.constants.jwt_utils import SECRET_KEY, create_access_token, verify_token
+from app.utils.process_pool import BoundedProcessPool, PoolSaturatedError
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_password_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.ARGON2_PARALLELISM,
+) -> CryptContext:
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME must be one of {PASSWORD_HASH_SCHEMES}, got {scheme!r}")
+    # every supported scheme stays verifiable; deprecated="auto" flags the non-default ones, and the
+    # min_* settings flag hashes made with a lower cost, so needs_update() catches both
+    return CryptContext(
+        schemes=[scheme, *(other for other in PASSWORD_HASH_SCHEMES if other != scheme)],
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_password_context()
 
-# allow SECRET_KEY from settings or env var; fall back to a development default
-SECRET_KEY = getattr(settings, "SECRET_KEY", None) or os.environ.get("SECRET_KEY", "devsecret")
 
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def hash_passwords(passwords: list[str]) -> list[str]:
+    # module-level so it can be shipped to a process pool
+    return [pwd_context.hash(password) for password in passwords]
+
+
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
-    expires = datetime.utcnow() + (expires_delta or timedelta(minutes=60))
-    payload = {"sub": subject, "exp": expires}
-    token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
-    return token
+def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    # the second item is a fresh hash when the stored one uses an old scheme or cost
+    return pwd_context.verify_and_update(password, hashed)
+
+
+# bcrypt runs in these worker processes, off the event loop and the request threadpool
+password_pool = BoundedProcessPool(max_workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def _run_password_job(fn, *args):
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolSaturatedError:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_job(hash_password, password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    """Hash a batch in one job per pool worker; the jobs count against the pool's pending cap."""
+    size = max(-(-len(passwords) // password_pool.max_workers), 1)
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    hashed = await asyncio.gather(*[_run_password_job(hash_passwords, chunk) for chunk in chunks])
+    return list(itertools.chain.from_iterable(hashed))
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run_password_job(verify_password, password, hashed)
+
+
+async def verify_and_update_password_async(password: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run_password_job(verify_and_update_password, password, hashed)
 
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
\ No newline at end of file
+    # verified claims are cached per token, so repeated calls skip the signature check and JSON parsing
+    return verify_token(token)
@@ -0,0 +1,33 @@
+"""Strong ETags and ``If-None-Match`` handling for the detail and listing routes.
+
+Detail routes tag a row by its id and ``version`` column, which the ORM bumps on
+every update, so a revalidation needs only the version (one indexed lookup, no
+serialization). Listings hash the serialized page instead.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Response, status
+
+
+def row_etag(kind: str, row_id: int, version: int) -> str:
+    return f'"{kind}-{row_id}-v{version}"'
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    """RFC 9110 If-None-Match: weak comparison against any listed tag, or ``*``."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
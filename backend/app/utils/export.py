@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.sessions.db import AsyncSessionLocal, get_async_engine
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_BATCH_SIZE = 1000
+
+
+def _encode(rows, columns: list[str], fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return "".join(json.dumps(dict(row._mapping), default=str) + "\n" for row in rows).encode()
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([getattr(row, column) for column in columns] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(stream_rows: Callable[[AsyncSession, int], AsyncIterator[list]], columns: list[str], fmt: str) -> AsyncIterator[bytes]:
+    """Encode rows from a server-side cursor as they arrive, one chunk per fetched partition.
+
+    The generator owns its session: it outlives the request handler, so it
+    can't borrow the one from the route's dependency.
+    """
+    get_async_engine()
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            yield buffer.getvalue().encode()
+        async for partition in stream_rows(db, EXPORT_BATCH_SIZE):
+            yield _encode(partition, columns, fmt)
@@ -0,0 +1,76 @@
+"""Auth state of the current user, loaded at most once per request and rarely per second.
+
+Lookups go request.state -> process-wide TTL cache -> database. The process
+cache is invalidated by the soft/hard delete DAOs; other API processes pick up
+those changes once their entry's USER_STATE_CACHE_TTL runs out.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from fastapi import Request
+
+from app.config.base import settings
+from app.daos.users import get_user_auth_state_async
+from app.sessions.db import AsyncSessionLocal, get_async_engine
+
+
+class UserAuthState(NamedTuple):
+    id: int
+    role: str
+    is_active: bool
+    is_deleted: bool
+
+
+class UserStateCache:
+    """Bounded LRU of user id -> UserAuthState, each entry valid for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[UserAuthState, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> UserAuthState | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def put(self, state: UserAuthState) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[state.id] = (state, time.monotonic() + self.ttl)
+            self._entries.move_to_end(state.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+user_states = UserStateCache(settings.USER_STATE_CACHE_TTL, settings.USER_STATE_CACHE_SIZE)
+
+
+async def load_user_state(request: Request, user_id: int) -> UserAuthState | None:
+    per_request = getattr(request.state, "user_states", None)
+    if per_request is None:
+        per_request = request.state.user_states = {}
+    if user_id in per_request:
+        return per_request[user_id]
+
+    state = user_states.get(user_id)
+    if state is None:
+        get_async_engine()
+        async with AsyncSessionLocal() as db:
+            row = await get_user_auth_state_async(db, user_id)
+        if row is not None:
+            state = UserAuthState(*row)
+            user_states.put(state)
+    per_request[user_id] = state
+    return state
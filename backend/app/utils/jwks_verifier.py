@@ -0,0 +1,75 @@
+"""Verify API access tokens outside the API process.
+
+Analysis workers, the file-serving sidecar and any other downstream component
+build one verifier per process pointed at the API's ``/.well-known/jwks.json``.
+Public keys are fetched once and cached by ``kid``; a token naming a kid we
+have not seen triggers at most one refetch per ``min_refresh_interval``
+seconds, so steady-state verification makes no network calls.
+
+    verifier = JWKSVerifier("https://api.example.com/.well-known/jwks.json")
+    claims = verifier.verify(token)
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.request
+from typing import Callable
+
+import jwt
+from jwt import PyJWK
+
+
+class JWKSVerifier:
+    def __init__(
+        self,
+        jwks_url: str | None = None,
+        *,
+        fetch: Callable[[], dict] | None = None,
+        algorithms: tuple[str, ...] = ("RS256", "EdDSA"),
+        min_refresh_interval: float = 60.0,
+        timeout: float = 5.0,
+    ) -> None:
+        if (jwks_url is None) == (fetch is None):
+            raise ValueError("pass either jwks_url or fetch")
+        self.jwks_url = jwks_url
+        self.algorithms = algorithms
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._fetch = fetch or self._fetch_url
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _fetch_url(self) -> dict:
+        with urllib.request.urlopen(self.jwks_url, timeout=self.timeout) as resp:
+            return json.load(resp)
+
+    def refresh(self) -> None:
+        jwk_set = self._fetch()
+        self._keys = {jwk["kid"]: PyJWK(jwk) for jwk in jwk_set.get("keys", []) if "kid" in jwk}
+        self._fetched_at = time.monotonic()
+
+    def get_key(self, kid: str | None) -> PyJWK:
+        key = self._keys.get(kid)
+        if key is None:
+            with self._lock:
+                # an unknown kid usually means the API rotated keys; refetch, but never more than once per interval
+                if kid not in self._keys and time.monotonic() - self._fetched_at >= self.min_refresh_interval:
+                    self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"unknown signing key {kid!r}")
+        return key
+
+    def verify(self, token: str) -> dict:
+        """Return an access token's claims, raising ``jwt.InvalidTokenError`` if it is bad, expired or not an access token."""
+        key = self.get_key(jwt.get_unverified_header(token).get("kid"))
+        if key.algorithm_name not in self.algorithms:
+            raise jwt.InvalidTokenError(f"signing algorithm {key.algorithm_name} is not accepted")
+        claims = jwt.decode(token, key.key, algorithms=[key.algorithm_name])
+        # refresh tokens are signed by the same keys; tokens without a type predate them and are access tokens
+        if claims.get("type", "access") != "access":
+            raise jwt.InvalidTokenError(f"{claims['type']} tokens are not accepted")
+        return claims
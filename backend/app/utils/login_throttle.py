@@ -0,0 +1,216 @@
+"""Failed-login counters that lock out an email or client IP before any hashing work.
+
+Each failure bumps a counter for the email and for the client IP. Attempts
+are counted before the password is checked, atomically with the lockout
+check, so a burst of concurrent guesses can't all slip past it. Once a
+counter reaches its threshold the key is locked out for ``base_delay``
+seconds, doubling with every further failure up to ``max_delay``; a counter
+is forgotten after ``window`` seconds without attempts. Counters live in Redis
+when ``REDIS_URL`` is set, so every API process sees the same lockouts, and in
+a bounded in-process LRU otherwise (or while Redis is unreachable).
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from app.config.base import settings
+from app.config.redis_config import REDIS_ERRORS, get_redis_pool
+
+KEY_PREFIX = "login-throttle"
+
+
+def lockout_seconds(failures: int, threshold: int, base_delay: float, max_delay: float) -> float:
+    if failures < threshold:
+        return 0.0
+    return min(base_delay * 2 ** (failures - threshold), max_delay)
+
+
+class LocalFailureStore:
+    """LRU of key -> [failures, last failure time, attempts in flight, last touched], capped at ``max_keys`` entries.
+
+    Each operation is a single read-modify-write under a lock, like the Redis scripts.
+    """
+
+    def __init__(self, max_keys: int, window: float):
+        self.max_keys = max_keys
+        self.window = window
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str, now: float) -> list:
+        entry = self._entries.get(key)
+        if entry is None or now - entry[3] > self.window:
+            entry = self._entries[key] = [0, 0.0, 0, now]
+        entry[3] = now
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def reserve(self, key: str, threshold: int, base_delay: float, max_delay: float, ttl: float) -> float:
+        now = time.time()
+        with self._lock:
+            entry = self._entry(key, now)
+            failures, last, in_flight, _ = entry
+            if failures + in_flight >= threshold:
+                remaining = last + lockout_seconds(failures, threshold, base_delay, max_delay) - now
+                if remaining > 0 or in_flight:
+                    return max(remaining, 1.0)
+            entry[2] += 1
+            return 0.0
+
+    async def settle(self, key: str, failed: bool, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            entry = self._entry(key, now)
+            entry[2] = max(entry[2] - 1, 0)
+            if failed:
+                entry[0] += 1
+                entry[1] = now
+
+    async def clear(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisFailureStore:
+    """Same counters as a Redis hash per key, updated by scripts and expiring once the key can no longer be locked out."""
+
+    # KEYS[1]: counters; ARGV: now, threshold, base delay, max delay, ttl
+    # returns the lockout left in seconds (as a string, Lua numbers would be truncated), "0" once reserved
+    _reserve_script = """
+local failures = tonumber(redis.call('HGET', KEYS[1], 'failures') or '0')
+local last = tonumber(redis.call('HGET', KEYS[1], 'last') or '0')
+local in_flight = tonumber(redis.call('HGET', KEYS[1], 'in_flight') or '0')
+local now, threshold = tonumber(ARGV[1]), tonumber(ARGV[2])
+if failures + in_flight >= threshold then
+  local lockout = 0
+  if failures >= threshold then
+    lockout = math.min(tonumber(ARGV[3]) * 2 ^ (failures - threshold), tonumber(ARGV[4]))
+  end
+  local remaining = last + lockout - now
+  if remaining > 0 or in_flight > 0 then
+    return tostring(math.max(remaining, 1))
+  end
+end
+redis.call('HINCRBY', KEYS[1], 'in_flight', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return '0'
+"""
+
+    # KEYS[1]: counters; ARGV: now, failed (0/1), ttl
+    _settle_script = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return 0
+end
+if tonumber(redis.call('HGET', KEYS[1], 'in_flight') or '0') > 0 then
+  redis.call('HINCRBY', KEYS[1], 'in_flight', -1)
+end
+if ARGV[2] == '1' then
+  redis.call('HINCRBY', KEYS[1], 'failures', 1)
+  redis.call('HSET', KEYS[1], 'last', ARGV[1])
+  redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def reserve(self, key: str, threshold: int, base_delay: float, max_delay: float, ttl: float) -> float:
+        remaining = await self.redis.eval(self._reserve_script, 1, key, time.time(), threshold, base_delay, max_delay, math.ceil(ttl))
+        return float(remaining)
+
+    async def settle(self, key: str, failed: bool, ttl: float) -> None:
+        await self.redis.eval(self._settle_script, 1, key, time.time(), int(failed), math.ceil(ttl))
+
+    async def clear(self, key: str) -> None:
+        await self.redis.delete(key)
+
+
+class LoginThrottle:
+    """Counts each login attempt before the password is checked.
+
+    ``check`` reserves an in-flight attempt for the email and the IP in one
+    atomic step, so concurrent guesses see each other: once failures plus
+    attempts in flight reach the threshold, further attempts wait for the
+    lockout and for the ones in flight to finish. Every successful ``check``
+    must be followed by ``record_failure``, ``record_success`` or ``release``.
+    """
+
+    def __init__(self, *, email_threshold: int, ip_threshold: int, base_delay: float, max_delay: float, window: float, max_keys: int):
+        self.email_threshold = email_threshold
+        self.ip_threshold = ip_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.local = LocalFailureStore(max_keys=max_keys, window=window)
+
+    def lockout_seconds(self, failures: int, threshold: int) -> float:
+        return lockout_seconds(failures, threshold, self.base_delay, self.max_delay)
+
+    def _keys(self, email: str, ip: str) -> list[tuple[str, int]]:
+        # emails are hashed so Redis never holds them in clear text
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+        return [(f"{KEY_PREFIX}:email:{digest}", self.email_threshold), (f"{KEY_PREFIX}:ip:{ip}", self.ip_threshold)]
+
+    async def _stores(self) -> list:
+        redis = await get_redis_pool()
+        return [RedisFailureStore(redis), self.local] if redis is not None else [self.local]
+
+    async def _call(self, method: str, *args):
+        for store in await self._stores():
+            try:
+                return await getattr(store, method)(*args)
+            except REDIS_ERRORS as exc:
+                print(f"login throttle: Redis unavailable ({exc}); using in-process counters")
+
+    async def check(self, email: str, ip: str) -> None:
+        """Reserve an attempt, or raise 429 with Retry-After while the email or the IP is locked out."""
+        reserved = []
+        for key, threshold in self._keys(email, ip):
+            remaining = await self._call("reserve", key, threshold, self.base_delay, self.max_delay, self.window + self.max_delay)
+            if remaining > 0:
+                for held in reserved:
+                    await self._call("settle", held, False, self.window + self.max_delay)
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many failed login attempts, try again later",
+                    headers={"Retry-After": str(math.ceil(remaining))},
+                )
+            reserved.append(key)
+
+    async def record_failure(self, email: str, ip: str) -> None:
+        for key, _ in self._keys(email, ip):
+            await self._call("settle", key, True, self.window + self.max_delay)
+
+    async def record_success(self, email: str, ip: str) -> None:
+        # only the account is cleared: one good password from an IP says nothing about its other attempts
+        (email_key, _), (ip_key, _) = self._keys(email, ip)
+        await self._call("clear", email_key)
+        await self._call("settle", ip_key, False, self.window + self.max_delay)
+
+    async def release(self, email: str, ip: str) -> None:
+        """Drop a reserved attempt that ended without a verdict (an error or a cancelled request)."""
+        for key, _ in self._keys(email, ip):
+            await self._call("settle", key, False, self.window + self.max_delay)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+login_throttle = LoginThrottle(
+    email_threshold=settings.LOGIN_THROTTLE_EMAIL_THRESHOLD,
+    ip_threshold=settings.LOGIN_THROTTLE_IP_THRESHOLD,
+    base_delay=settings.LOGIN_THROTTLE_BASE_DELAY,
+    max_delay=settings.LOGIN_THROTTLE_MAX_DELAY,
+    window=settings.LOGIN_THROTTLE_WINDOW,
+    max_keys=settings.LOGIN_THROTTLE_MAX_KEYS,
+)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import base64
+import json
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str | None, fields: tuple[str, ...] = ("id",)) -> dict | None:
+    """Turn an opaque ``next_cursor`` token back into the keyset position it encodes.
+
+    Every field must be an integer: cursors come back from clients, and a tampered
+    one must be a 400 here rather than a driver error when it reaches the query.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(position, dict) or any(type(position.get(field)) is not int for field in fields):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+
+def keyset_page(rows: list, limit: int, position_of=lambda row: {"id": row.id}) -> tuple[list, str | None]:
+    """Split rows fetched with ``limit + 1`` into the page and the cursor of the next one."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(position_of(rows[-1]))
+    return rows, None
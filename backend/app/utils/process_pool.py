@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+class PoolSaturatedError(Exception):
+    """Raised instead of queueing when a BoundedProcessPool already has ``max_pending`` jobs."""
+
+
+class BoundedProcessPool:
+    """Process pool for CPU-bound work with a cap on queued + running jobs.
+
+    Work past the cap is rejected immediately, so a burst sheds load instead of
+    building a queue whose tail latency is worse than a fast failure. Worker
+    processes are started lazily on first use.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent runs an event loop and DB driver threads
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturatedError(f"{self.pending} jobs already pending")
+            self.pending += 1
+            executor = self._get_executor()
+        try:
+            job = executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # the slot is freed when the job finishes, not when the caller stops waiting: a
+        # cancelled await leaves a started job running in its worker
+        job.add_done_callback(self._release)
+        return await asyncio.wrap_future(job)
+
+    def _release(self, job=None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
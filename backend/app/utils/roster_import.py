@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.base import settings
+from app.daos.patients import bulk_create_patients_async
+from app.schemas.patients import ImportRowError, PatientImportReport, PatientSignupRequest
+from app.utils.auth import hash_passwords_async
+
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 1000
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines, holding at most one partial line in memory."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class RecordParser:
+    """Parses one record per line: CSV with a header row first, or NDJSON objects."""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.header: list[str] | None = None
+
+    def parse(self, line: str) -> dict | None:
+        """Return the record on ``line``, or None for the CSV header."""
+        if self.fmt == "ndjson":
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            return record
+        values = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"expected {len(self.header)} columns, got {len(values)}")
+        # empty cells mean "not provided", like a missing NDJSON key
+        return {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+def _fail(report: PatientImportReport, row: int, email, error: str) -> None:
+    report.failed += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(ImportRowError(row=row, email=email if isinstance(email, str) else None, error=error))
+
+
+async def _insert_batch(db: AsyncSession, batch: list[tuple[int, PatientSignupRequest]], report: PatientImportReport) -> None:
+    hashed = await hash_passwords_async([payload.password for _, payload in batch])
+    rows = [
+        (
+            dict(email=payload.email, hashed_password=hashed_password, first_name=payload.first_name, last_name=payload.last_name),
+            dict(country=payload.country, province=payload.province, ethnicity=payload.ethnicity),
+        )
+        for (_, payload), hashed_password in zip(batch, hashed)
+    ]
+    try:
+        created = await bulk_create_patients_async(db, rows)
+    except IntegrityError as e:
+        # the batch was rolled back as a whole; the rest of the import carries on
+        for row, payload in batch:
+            _fail(report, row, payload.email, f"database error: {e.orig}")
+        return
+    report.imported += len(created)
+    for row, payload in batch:
+        if payload.email not in created:
+            _fail(report, row, payload.email, "email already registered")
+
+
+async def import_patients_async(db: AsyncSession, lines: AsyncIterable[str], fmt: str) -> PatientImportReport:
+    """Stream-import a patient roster, validating each record with ``PatientSignupRequest``.
+
+    Passwords are hashed in the shared password pool and rows are inserted in batches of
+    ``IMPORT_BATCH_SIZE``. Bad records are reported by line number without
+    aborting the import.
+    """
+    report = PatientImportReport()
+    parser = RecordParser(fmt)
+    seen_emails: set[str] = set()
+    batch: list[tuple[int, PatientSignupRequest]] = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = parser.parse(line)
+        except (ValueError, csv.Error) as e:
+            report.rows += 1
+            _fail(report, line_number, None, f"unparseable record: {e}")
+            continue
+        if record is None:
+            continue
+        report.rows += 1
+        try:
+            payload = PatientSignupRequest.model_validate(record)
+        except ValidationError as e:
+            details = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            _fail(report, line_number, record.get("email"), details)
+            continue
+        if payload.email in seen_emails:
+            _fail(report, line_number, payload.email, "duplicate email in file")
+            continue
+        seen_emails.add(payload.email)
+        batch.append((line_number, payload))
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            await _insert_batch(db, batch, report)
+            batch = []
+    if batch:
+        await _insert_batch(db, batch, report)
+    return report
@@ -0,0 +1,90 @@
+"""Revoked access tokens, checked on every authenticated request without touching the DB.
+
+Revoked jtis live in a Bloom filter rebuilt from ``revoked_tokens`` every
+REVOCATION_SYNC_SECONDS (and updated at once for revocations made by this
+process). A miss is definitive, so valid tokens cost a few hash probes; a hit
+is confirmed with a primary-key lookup, which absorbs false positives. Other
+processes see a revocation after at most one sync interval.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+
+from app.config.base import settings
+from app.daos.tokens import is_access_token_revoked_async, list_revoked_access_jtis_async, purge_expired_tokens_async
+from app.sessions.db import AsyncSessionLocal, get_async_engine
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # double hashing: k probe positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationFilter:
+    def __init__(self, capacity: int, fp_rate: float) -> None:
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._added_during_sync: list[str] | None = None
+        self.size = 0
+
+    def add(self, jti: str) -> None:
+        self._filter.add(jti)
+        if self._added_during_sync is not None:
+            self._added_during_sync.append(jti)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return jti in self._filter
+
+    async def is_revoked(self, jti: str) -> bool:
+        if not self.might_be_revoked(jti):
+            return False
+        get_async_engine()
+        async with AsyncSessionLocal() as db:
+            return await is_access_token_revoked_async(db, jti)
+
+    async def sync(self) -> None:
+        """Rebuild the filter from the DB, sized for what is there now."""
+        self._added_during_sync = []
+        try:
+            get_async_engine()
+            async with AsyncSessionLocal() as db:
+                await purge_expired_tokens_async(db)
+                jtis = await list_revoked_access_jtis_async(db)
+            rebuilt = BloomFilter(max(self.capacity, 2 * len(jtis)), self.fp_rate)
+            # revocations committed by this process after the SELECT must survive the swap
+            for jti in (*jtis, *self._added_during_sync):
+                rebuilt.add(jti)
+            self._filter, self.size = rebuilt, len(jtis)
+        finally:
+            self._added_during_sync = None
+
+    async def run(self, interval: float) -> None:
+        """Background loop started by the app lifespan."""
+        while True:
+            try:
+                await self.sync()
+            except Exception as exc:  # keep the last filter; the next round retries
+                print(f"token revocation sync failed: {exc}")
+            await asyncio.sleep(interval)
+
+
+revoked_access_tokens = RevocationFilter(settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_FP_RATE)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.base import settings
+from app.constants.jwt_utils import create_access_token, create_refresh_token, decode_access_token, decode_refresh_token, new_jti
+from app.daos.tokens import add_refresh_token_async, revoke_access_token_async, revoke_refresh_family_async, rotate_refresh_token_async
+from app.schemas.auth.auth_response import TokenResponse
+from app.utils.token_revocation import revoked_access_tokens
+
+
+def _token_pair(user_id: str, jti: str, family_id: str, expires_at: datetime) -> TokenResponse:
+    return TokenResponse(access_token=create_access_token(user_id), refresh_token=create_refresh_token(user_id, jti, family_id, expires_at))
+
+
+async def issue_tokens_async(db: AsyncSession, user_id: int) -> TokenResponse:
+    """Access token plus the first refresh token of a new family, one family per login."""
+    jti = new_jti()
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_TTL_DAYS)
+    await add_refresh_token_async(db, jti=jti, user_id=user_id, family_id=jti, expires_at=expires_at)
+    return _token_pair(str(user_id), jti, jti, expires_at)
+
+
+async def refresh_tokens_async(db: AsyncSession, refresh_token: str) -> TokenResponse:
+    # signature check plus one primary-key UPDATE; no password hashing and no user lookup
+    claims = decode_refresh_token(refresh_token)
+    jti = new_jti()
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_TTL_DAYS)
+    rotated = await rotate_refresh_token_async(db, jti=claims["jti"], new_jti=jti, user_id=int(claims["sub"]), family_id=claims["fam"], expires_at=expires_at)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Refresh token is no longer valid")
+    return _token_pair(claims["sub"], jti, claims["fam"], expires_at)
+
+
+async def revoke_tokens_async(db: AsyncSession, *, refresh_token: str, access_token: str | None = None) -> None:
+    """Logout: end the refresh token's family and, when given, the same user's access token presented with it.
+
+    The refresh token alone authorizes the logout, so it works after the access token has expired.
+    """
+    claims = decode_refresh_token(refresh_token)
+    await revoke_refresh_family_async(db, claims["fam"])
+    if not access_token:
+        return
+    try:
+        access_claims = decode_access_token(access_token)
+    except HTTPException:
+        # expired or invalid: it can't be used anyway, so there is nothing to revoke
+        return
+    if access_claims["sub"] == claims["sub"] and "jti" in access_claims:
+        await revoke_access_token_async(db, jti=access_claims["jti"], expires_at=datetime.utcfromtimestamp(access_claims["exp"]))
+        revoked_access_tokens.add(access_claims["jti"])
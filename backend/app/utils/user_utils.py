@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException
 from fastapi import Request
 from sqlalchemy.orm import Session
 
 from app.constants import jwt_utils
+from app.utils.identity_cache import UserAuthState, load_user_state
+from app.utils.token_revocation import revoked_access_tokens
 
 
 def response_formatter(message, data=None):
@@ -19,18 +21,27 @@ def check_existing_field(db_session: Session, model, field, value):
     return False
 
 
-async def get_current_user(request: Request):
-    token = request.headers.get("Authorization")
-    if not token:
-        raise HTTPException(status_code=401, detail="Token not provided")
-
-    try:
-        user_id = int(dict(request).get("path_params")["user_id"])  # type: ignore
-        token = token.split(" ")[1]
-        payload = jwt_utils.decode_access_token(token)
-        if user_id == int(payload["id"]):
-            return payload
-        else:
-            raise HTTPException(status_code=401, detail="Unauthorized")
-    except HTTPException as e:
-        raise HTTPException(status_code=401, detail=e.detail)
+async def get_current_user(request: Request) -> dict:
+    """Dependency for protected routes: the verified claims of the request's bearer token.
+
+    On routes with a ``user_id`` path parameter the token must belong to that user.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Token not provided", headers={"WWW-Authenticate": "Bearer"})
+
+    payload = jwt_utils.decode_access_token(token)
+    if "jti" in payload and await revoked_access_tokens.is_revoked(payload["jti"]):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    user_id = request.path_params.get("user_id")
+    if user_id is not None and str(user_id) != str(payload.get("sub")):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return payload
+
+
+async def get_current_active_user(request: Request, claims: dict = Depends(get_current_user)) -> UserAuthState:
+    """Dependency for routes that need the caller to still exist and be active, not just hold a valid token."""
+    state = await load_user_state(request, int(claims["sub"]))
+    if state is None or state.is_deleted or not state.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive or deleted")
+    return state
@@ -0,0 +1,117 @@
+"""Invalidation messages between API processes, so every worker's L1 cache drops purged entries.
+
+Messages are small dicts (``{"tags": [...]}``, ``{"keys": [...]}`` or
+``{"clear": True}``) stamped with the sending process's ``origin``; a process
+ignores its own. Delivery is at most once on both transports, so listeners
+clear their L1 whenever they (re)subscribe: whatever was published while they
+were not listening is covered by starting empty.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.redis_config import REDIS_ERRORS
+
+# a valid Redis channel and an unquoted Postgres identifier alike
+CHANNEL = "response_cache_invalidations"
+RECONNECT_SECONDS = 1.0
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class InvalidationBus:
+    name = "none"
+
+    def __init__(self) -> None:
+        self.origin = uuid.uuid4().hex
+
+    def encode(self, message: dict) -> str:
+        return json.dumps({**message, "origin": self.origin})
+
+    async def dispatch(self, payload: str, handle: Handler) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.pop("origin", None) != self.origin:
+            await handle(message)
+
+    async def publish(self, message: dict) -> None:
+        raise NotImplementedError
+
+    async def listen(self, handle: Handler, on_subscribe: Callable[[], Awaitable[None]]) -> None:
+        """Deliver other processes' messages to ``handle`` until cancelled, resubscribing after errors."""
+        raise NotImplementedError
+
+
+class RedisInvalidationBus(InvalidationBus):
+    name = "redis"
+
+    def __init__(self, redis) -> None:
+        super().__init__()
+        self.redis = redis
+
+    async def publish(self, message: dict) -> None:
+        try:
+            await self.redis.publish(CHANNEL, self.encode(message))
+        except REDIS_ERRORS as e:
+            print(f"Response cache invalidation broadcast failed: {e}")
+
+    async def listen(self, handle: Handler, on_subscribe: Callable[[], Awaitable[None]]) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    await on_subscribe()
+                    while True:
+                        # polled with a timeout: the pool's socket timeout would abort a blocking read
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is not None:
+                            await self.dispatch(message["data"], handle)
+            except REDIS_ERRORS as e:
+                print(f"Response cache invalidation subscription lost: {e}")
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """LISTEN/NOTIFY on the application database, for deployments without Redis.
+
+    The listener holds one connection of the async engine's pool for as long as it runs.
+    """
+
+    name = "postgres"
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        super().__init__()
+        self.engine = engine
+
+    async def publish(self, message: dict) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(select(func.pg_notify(CHANNEL, self.encode(message))))
+                await conn.commit()
+        except Exception as e:
+            print(f"Response cache invalidation broadcast failed: {e}")
+
+    async def listen(self, handle: Handler, on_subscribe: Callable[[], Awaitable[None]]) -> None:
+        while True:
+            try:
+                async with self.engine.connect() as conn:
+                    listener = (await conn.get_raw_connection()).driver_connection
+                    payloads: asyncio.Queue[str | None] = asyncio.Queue()
+                    await listener.add_listener(CHANNEL, lambda _conn, _pid, _channel, payload: payloads.put_nowait(payload))
+                    # None: the connection died and notifications stopped
+                    listener.add_termination_listener(lambda _conn: payloads.put_nowait(None))
+                    await on_subscribe()
+                    while (payload := await payloads.get()) is not None:
+                        await self.dispatch(payload, handle)
+                    print("Response cache invalidation listener disconnected")
+            except Exception as e:
+                print(f"Response cache invalidation subscription lost: {e}")
+            await asyncio.sleep(RECONNECT_SECONDS)
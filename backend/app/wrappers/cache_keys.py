@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import Scope
+
+from app.constants.jwt_utils import SECRET_KEY, decode_access_token
+
+
+class CachedEndpoint:
+    """A cached route: its full-path regex, whether entries are per user, and the request headers it varies on.
+
+    ``per_user=False`` is for responses that are identical for every caller; all
+    callers then share one entry. Per-user entries are keyed by the verified
+    token subject, never by the token itself.
+
+    ``tags`` are templates filled from the pattern's named groups
+    (``"patient:{patient_id}"``); writes purge entries by tag (see
+    ``app.wrappers.cache_tags``), so tagged routes can set a long ``max_age``.
+    """
+
+    def __init__(self, pattern: str, *, per_user: bool = True, vary: tuple[str, ...] = (), tags: tuple[str, ...] = (), max_age: int | None = None) -> None:
+        self.pattern = re.compile(pattern)
+        self.per_user = per_user
+        self.vary = tuple(sorted(header.lower() for header in vary))
+        self.tags = tags
+        self.max_age = max_age
+
+    def matches(self, path: str) -> bool:
+        return self.pattern.fullmatch(path) is not None
+
+    def tags_for(self, path: str) -> tuple[str, ...]:
+        path_match = self.pattern.fullmatch(path)
+        return tuple(tag.format(**path_match.groupdict()) for tag in self.tags) if path_match else ()
+
+    def vary_header(self) -> str | None:
+        names = [*self.vary, *(("authorization",) if self.per_user else ())]
+        return ", ".join(names) or None
+
+
+def normalized_query(query_string: bytes) -> str:
+    """``b=2&a=1&a=0`` and ``a=0&b=2&a=1`` are the same request; blank values are kept."""
+    return urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+
+
+def cache_principal(headers: Headers) -> str:
+    """Keyed hash of the caller's verified identity (from an access token), so cache keys (and Redis) never hold tokens or user ids."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    subject = "anonymous"
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = f"user:{decode_access_token(token)['sub']}"
+        except Exception:
+            # a bad token shares the anonymous entry; the route itself answers 401, which is never cached
+            pass
+    return hmac.new(SECRET_KEY.encode(), subject.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def build_cache_key(endpoint: CachedEndpoint, scope: Scope) -> str:
+    headers = Headers(scope=scope)
+    parts = [normalized_query(scope["query_string"])]
+    parts += [f"{name}={headers.get(name, '').strip()}" for name in endpoint.vary]
+    parts.append(cache_principal(headers) if endpoint.per_user else "public")
+    # the path stays readable in front of a fixed-size digest of everything else
+    return f"{scope['path']}#{hashlib.sha256(chr(0).join(parts).encode()).hexdigest()[:32]}"
@@ -0,0 +1,126 @@
+"""Which cached responses a write makes stale, and purging them once it commits.
+
+Cached routes declare tags in ``app.app.CACHED_ENDPOINTS``. Sessions collect
+the tags their writes touch: flushed profile and user rows tag their detail
+page and listing, and INSERT/UPDATE/DELETE statements tag the listing of the
+table they hit. DAOs add what the session can't see with ``tag_cache`` (a
+soft delete only dirties the ``users`` row, for instance). Tags are purged
+after the commit and dropped on rollback, so an aborted write purges nothing.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from app.models.patients import PatientProfile
+from app.models.practitioners import PractitionerProfile
+from app.models.users import User
+from app.sessions.routing import RoutingSession
+from app.wrappers.cache_wrappers import CacheUtils
+
+PATIENTS_LIST = "patients:list"
+PRACTITIONERS_LIST = "practitioners:list"
+
+# listings a bulk statement on each table can change; user columns appear in both
+_TABLE_TAGS = {
+    "patients": (PATIENTS_LIST,),
+    "practitioners": (PRACTITIONERS_LIST,),
+    "users": (PATIENTS_LIST, PRACTITIONERS_LIST),
+}
+
+# purges started from sync code running on an event loop; referenced until done
+_pending: set[asyncio.Task] = set()
+
+
+def patient_tags(patient_id: int) -> tuple[str, ...]:
+    return (f"patient:{patient_id}", PATIENTS_LIST)
+
+
+def practitioner_tags(practitioner_id: str) -> tuple[str, ...]:
+    return (f"practitioner:{practitioner_id}", PRACTITIONERS_LIST)
+
+
+def tag_cache(db, *tags: str) -> None:
+    """Purge ``tags`` when ``db`` (a Session or AsyncSession) next commits."""
+    db.info.setdefault("cache_tags", set()).update(tags)
+
+
+def _values(obj, attr: str) -> list:
+    # current and pre-flush values, without loading anything that isn't loaded yet
+    history = sa_inspect(obj).attrs[attr].history
+    return [value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None]
+
+
+def _object_tags(obj) -> tuple[str, ...]:
+    if isinstance(obj, PatientProfile):
+        return tuple(tag for patient_id in _values(obj, "id") for tag in patient_tags(patient_id)) or (PATIENTS_LIST,)
+    if isinstance(obj, PractitionerProfile):
+        return tuple(tag for practitioner_id in _values(obj, "practitioner_id") for tag in practitioner_tags(practitioner_id)) or (PRACTITIONERS_LIST,)
+    if isinstance(obj, User):
+        tags = [tag for profile in _values(obj, "patient_profile") + _values(obj, "practitioner_profile") for tag in _object_tags(profile)]
+        roles = set(_values(obj, "role")) or {"patient", "practitioner"}
+        tags += [PATIENTS_LIST if role == "patient" else PRACTITIONERS_LIST for role in roles]
+        return tuple(tags)
+    return ()
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _tag_flushed_rows(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))):
+        tags = _object_tags(obj)
+        if tags:
+            tag_cache(session, *tags)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _tag_statements(orm_execute_state) -> None:
+    # bulk statements don't say which rows they touch; their listings are stale either way
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        tags = _TABLE_TAGS.get(getattr(table, "name", None), ())
+        if tags:
+            tag_cache(orm_execute_state.session, *tags)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _purge_committed(session: Session) -> None:
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        purge(tuple(sorted(tags)))
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop("cache_tags", None)
+
+
+async def _invalidate(tags: tuple[str, ...], detached: bool = False) -> None:
+    try:
+        await (CacheUtils.invalidate_tags_detached(tags) if detached else CacheUtils.invalidate_tags(tags))
+    except Exception as e:
+        # the write has committed either way; entries under these tags stay until their TTL runs out
+        print(f"Response cache invalidation of {list(tags)} failed: {e}")
+
+
+def purge(tags: tuple[str, ...]) -> None:
+    """Invalidate ``tags`` from a synchronous commit hook, waiting for it when the caller can."""
+    invalidation = _invalidate(tags)
+    try:
+        # AsyncSession commits run inside SQLAlchemy's greenlet: the purge finishes before commit() returns
+        await_only(invalidation)
+        return
+    except MissingGreenlet:
+        invalidation.close()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # a sync session off the event loop: this throwaway loop must not touch the app's connections
+        asyncio.run(_invalidate(tags, detached=True))
+        return
+    task = loop.create_task(_invalidate(tags))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy.engine import make_url
+
+from app.config.base import settings
+from app.config.redis_config import REDIS_ERRORS, create_redis_client, get_redis_pool
+from app.sessions import db
+from app.wrappers.cache_bus import InvalidationBus, PostgresInvalidationBus, RedisInvalidationBus
+
+CACHE_BACKENDS = ("memory", "redis")
+
+
+class CacheBackend:
+    """Where cached responses live. Values are text; ``get`` returns (value, seconds left) or (None, None)
+    and ``set`` whether the entry was stored. ``hits``/``misses`` count ``get`` outcomes.
+
+    Entries may carry tags; ``invalidate_tags`` drops every entry under a tag and
+    bumps the tag's version. ``set`` with ``versions`` (read by ``tag_versions``
+    before the response was computed) stores nothing if any tag was invalidated
+    meanwhile, so a response rendered from pre-write rows can't outlive the purge.
+    """
+
+    hits = 0
+    misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    async def get(self, key: str) -> tuple[str | None, int | None]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: int, tags: tuple[str, ...] = (), versions: tuple[int, ...] | None = None) -> bool:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def tag_versions(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        raise NotImplementedError
+
+    async def invalidate_tags(self, tags: tuple[str, ...]) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        """Claim the right to compute ``key`` across processes; a token on success, None if someone else holds it.
+
+        In-process backends have nothing to coordinate with (the middleware coalesces
+        within a process), so the default always succeeds.
+        """
+        return "local"
+
+    async def release_lock(self, key: str, token: str) -> None:
+        return None
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU with per-entry TTL, evicting least recently used entries past ``max_bytes``.
+
+    Tag versions are an LRU of at most ``max_tags`` tags, stamped from one
+    counter that never repeats: a tag evicted and seen again gets a new version,
+    so a write holding the old one is refused rather than trusted.
+    """
+
+    def __init__(self, max_bytes: int, max_tags: int = settings.CACHE_MAX_TAGS) -> None:
+        self.max_bytes = max_bytes
+        self.max_tags = max_tags
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._key_tags: dict[str, tuple[str, ...]] = {}
+        self._tagged: dict[str, set[str]] = {}
+        self._versions: OrderedDict[str, int] = OrderedDict()
+        self._clock = 0
+
+    @staticmethod
+    def _cost(key: str, value: str) -> int:
+        return len(key) + len(value)
+
+    def _pop(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self.size -= self._cost(key, value)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entries": len(self._entries), "bytes": self.size}
+
+    async def get(self, key: str) -> tuple[str | None, int | None]:
+        entry = self._entries.get(key)
+        remaining = entry[1] - time.monotonic() if entry is not None else 0
+        if remaining <= 0:
+            if entry is not None:
+                self._pop(key)
+            self.misses += 1
+            return None, None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0], int(remaining)
+
+    async def set(self, key: str, value: str, ttl: int, tags: tuple[str, ...] = (), versions: tuple[int, ...] | None = None) -> bool:
+        if versions is not None and versions != await self.tag_versions(tags):
+            return False
+        cost = self._cost(key, value)
+        if key in self._entries:
+            self._pop(key)
+        if ttl <= 0 or cost > self.max_bytes:
+            return False
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self.size += cost
+        if tags:
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+        return True
+
+    async def delete(self, key: str) -> None:
+        if key in self._entries:
+            self._pop(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._key_tags.clear()
+        self._tagged.clear()
+        self.size = 0
+
+    def _version(self, tag: str, bump: bool = False) -> int:
+        if bump or tag not in self._versions:
+            self._clock += 1
+            self._versions[tag] = self._clock
+        self._versions.move_to_end(tag)
+        while len(self._versions) > self.max_tags:
+            self._versions.popitem(last=False)
+        return self._versions[tag]
+
+    async def tag_versions(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(self._version(tag) for tag in tags)
+
+    async def invalidate_tags(self, tags: tuple[str, ...]) -> None:
+        for tag in tags:
+            self._version(tag, bump=True)
+            for key in list(self._tagged.get(tag, ())):
+                self._pop(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Entries shared by every API process, on the connection pool from ``app.config.redis_config``.
+
+    Redis failures read as misses and skipped writes, so an outage costs cache hits, not requests.
+    """
+
+    prefix = "response-cache:"
+    lock_prefix = "response-cache-lock:"
+    tag_prefix = "response-cache-tag:"  # set of the entry keys under a tag
+    version_prefix = "response-cache-version:"
+    # outlives any response computation, which is all a version has to be compared against
+    version_ttl = 24 * 3600
+    # delete the lock only if it is still ours; it may have expired and been taken by another worker
+    _release_script = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    # KEYS: entry, n versions, n tag sets; ARGV: value, ttl, n, check versions (0/1), n versions.
+    # Tag sets are only ever extended to outlive their newest entry.
+    _tagged_set_script = """
+local n = tonumber(ARGV[3])
+if ARGV[4] == '1' then
+  for i = 1, n do
+    if (redis.call('get', KEYS[1 + i]) or '0') ~= ARGV[4 + i] then return 0 end
+  end
+end
+redis.call('set', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+  local tag_key = KEYS[1 + n + i]
+  redis.call('sadd', tag_key, KEYS[1])
+  if redis.call('ttl', tag_key) < tonumber(ARGV[2]) then redis.call('expire', tag_key, ARGV[2]) end
+end
+return 1
+"""
+    # KEYS: tag set and version per tag, interleaved; ARGV: version ttl
+    _invalidate_script = """
+for i = 1, #KEYS, 2 do
+  redis.call('incr', KEYS[i + 1])
+  redis.call('expire', KEYS[i + 1], ARGV[1])
+  for _, key in ipairs(redis.call('smembers', KEYS[i])) do redis.call('del', key) end
+  redis.call('del', KEYS[i])
+end
+return 1
+"""
+
+    def __init__(self, redis) -> None:
+        self.redis = redis
+
+    async def get(self, key: str) -> tuple[str | None, int | None]:
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self.prefix + key)
+            pipe.ttl(self.prefix + key)
+            value, ttl = await pipe.execute()
+        except REDIS_ERRORS:
+            value = None
+        if value is None:
+            self.misses += 1
+            return None, None
+        self.hits += 1
+        return value, ttl
+
+    async def set(self, key: str, value: str, ttl: int, tags: tuple[str, ...] = (), versions: tuple[int, ...] | None = None) -> bool:
+        if ttl <= 0:
+            return False
+        try:
+            if not tags:
+                return bool(await self.redis.set(self.prefix + key, value, ex=ttl))
+            keys = [self.prefix + key, *(self.version_prefix + tag for tag in tags), *(self.tag_prefix + tag for tag in tags)]
+            args = [value, ttl, len(tags), 0 if versions is None else 1, *(versions or ())]
+            return await self.redis.eval(self._tagged_set_script, len(keys), *keys, *args) == 1
+        except REDIS_ERRORS:
+            return False
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.redis.delete(self.prefix + key)
+        except REDIS_ERRORS:
+            pass
+
+    async def clear(self) -> None:
+        try:
+            async for key in self.redis.scan_iter(match=self.prefix + "*", count=1000):
+                await self.redis.delete(key)
+        except REDIS_ERRORS:
+            pass
+
+    async def tag_versions(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        if not tags:
+            return ()
+        try:
+            versions = await self.redis.mget([self.version_prefix + tag for tag in tags])
+        except REDIS_ERRORS:
+            return tuple(-1 for _ in tags)  # matches no stored version, so the entry isn't written
+        return tuple(int(version or 0) for version in versions)
+
+    async def invalidate_tags(self, tags: tuple[str, ...]) -> None:
+        if not tags:
+            return
+        keys = [name for tag in tags for name in (self.tag_prefix + tag, self.version_prefix + tag)]
+        try:
+            await self.redis.eval(self._invalidate_script, len(keys), *keys, self.version_ttl)
+        except REDIS_ERRORS as e:
+            # entries under these tags stay until their TTL runs out
+            print(f"Response cache invalidation of {list(tags)} failed: {e}")
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis.set(self.lock_prefix + key, token, nx=True, px=int(ttl * 1000))
+        except REDIS_ERRORS:
+            return token  # without Redis there is nothing to coordinate; compute locally
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        try:
+            await self.redis.eval(self._release_script, 1, self.lock_prefix + key, token)
+        except REDIS_ERRORS:
+            pass
+
+
+class TieredCacheBackend(CacheBackend):
+    """A per-process LRU (L1) in front of a shared backend (L2, usually Redis).
+
+    Hits on L1 cost no network round trip. L2 stays authoritative for tag
+    versions and locks, and it stores each entry's tags next to the body so
+    entries copied into L1 can still be purged by tag. Purges are broadcast
+    on ``bus`` and every other process drops them from its L1. With no L2,
+    L1 is the whole cache and the bus only keeps processes' copies coherent.
+
+    ``epoch`` counts L1 purges: an entry read from L2, or written to it, is
+    only copied into L1 if no purge landed in between.
+    """
+
+    def __init__(self, l1: InMemoryCacheBackend, l2: CacheBackend | None, bus: InvalidationBus) -> None:
+        self.l1 = l1
+        self.l2 = l2
+        self.bus = bus
+        self.epoch = 0
+
+    def stats(self) -> dict:
+        return {"l1": self.l1.stats(), "l2": self.l2.stats() if self.l2 is not None else None, "bus": self.bus.name}
+
+    @staticmethod
+    def _wrap(tags: tuple[str, ...], value: str) -> str:
+        return f"{json.dumps(tags)}\n{value}"
+
+    @staticmethod
+    def _unwrap(stored: str) -> tuple[tuple[str, ...], str] | None:
+        tags, _, value = stored.partition("\n")
+        try:
+            return tuple(json.loads(tags)), value
+        except ValueError:
+            return None
+
+    async def get(self, key: str) -> tuple[str | None, int | None]:
+        value, ttl = await self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value, ttl
+        epoch = self.epoch
+        stored, ttl = await self.l2.get(key)
+        entry = self._unwrap(stored) if stored is not None else None
+        if entry is None:
+            return None, None
+        tags, value = entry
+        if epoch == self.epoch and ttl:
+            await self.l1.set(key, value, ttl, tags)
+        return value, ttl
+
+    async def set(self, key: str, value: str, ttl: int, tags: tuple[str, ...] = (), versions: tuple[int, ...] | None = None) -> bool:
+        if self.l2 is None:
+            return await self.l1.set(key, value, ttl, tags, versions)
+        epoch = self.epoch
+        if not await self.l2.set(key, self._wrap(tags, value), ttl, tags, versions):
+            return False
+        if epoch == self.epoch:
+            await self.l1.set(key, value, ttl, tags)
+        return True
+
+    async def delete(self, key: str) -> None:
+        await self.apply({"keys": [key]})
+        if self.l2 is not None:
+            await self.l2.delete(key)
+        await self.bus.publish({"keys": [key]})
+
+    async def clear(self) -> None:
+        await self.apply({"clear": True})
+        if self.l2 is not None:
+            await self.l2.clear()
+        await self.bus.publish({"clear": True})
+
+    async def tag_versions(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        return await (self.l2 or self.l1).tag_versions(tags)
+
+    async def invalidate_tags(self, tags: tuple[str, ...]) -> None:
+        # L2 first: once other processes hear about the purge, L2 must not hand the entries back
+        if self.l2 is not None:
+            await self.l2.invalidate_tags(tags)
+        await self.apply({"tags": list(tags)})
+        await self.bus.publish({"tags": list(tags)})
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        return await (self.l2 or self.l1).acquire_lock(key, ttl)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await (self.l2 or self.l1).release_lock(key, token)
+
+    async def apply(self, message: dict) -> None:
+        """Apply an invalidation message, local or from another process, to L1."""
+        self.epoch += 1
+        if message.get("clear"):
+            await self.l1.clear()
+        for key in message.get("keys", ()):
+            await self.l1.delete(key)
+        if message.get("tags"):
+            await self.l1.invalidate_tags(tuple(message["tags"]))
+
+    async def listen(self) -> None:
+        await self.bus.listen(self.apply, lambda: self.apply({"clear": True}))
+
+
+class CacheUtils:
+    """Facade the cache middleware talks to; the backend is picked from ``settings.CACHE_BACKEND`` on first use."""
+
+    backend: CacheBackend | None = None
+
+    @classmethod
+    async def get_backend(cls) -> CacheBackend:
+        if cls.backend is None:
+            if settings.CACHE_BACKEND not in CACHE_BACKENDS:
+                raise ValueError(f"CACHE_BACKEND must be one of {CACHE_BACKENDS}, got {settings.CACHE_BACKEND!r}")
+            redis = await get_redis_pool() if settings.CACHE_BACKEND == "redis" else None
+            if settings.CACHE_BACKEND == "redis" and redis is None:
+                print("CACHE_BACKEND=redis but REDIS_URL is not set; caching responses in process memory")
+            if redis is not None:
+                l2 = RedisCacheBackend(redis)
+                cls.backend = TieredCacheBackend(InMemoryCacheBackend(settings.CACHE_L1_MAX_BYTES), l2, RedisInvalidationBus(redis)) if settings.CACHE_L1_MAX_BYTES else l2
+            elif not db.TESTING and make_url(db.async_database_uri).get_backend_name() == "postgresql":
+                # several workers each hold a copy; NOTIFY keeps them from serving what another purged
+                cls.backend = TieredCacheBackend(InMemoryCacheBackend(settings.CACHE_MAX_BYTES), None, PostgresInvalidationBus(db.get_async_engine()))
+            else:
+                cls.backend = InMemoryCacheBackend(settings.CACHE_MAX_BYTES)
+        return cls.backend
+
+    @classmethod
+    async def listen(cls) -> None:
+        """Apply other processes' invalidations until cancelled; returns at once when there is nothing to sync."""
+        backend = await cls.get_backend()
+        if isinstance(backend, TieredCacheBackend):
+            await backend.listen()
+
+    @classmethod
+    async def stats(cls) -> dict:
+        backend = await cls.get_backend()
+        return backend.stats() if isinstance(backend, TieredCacheBackend) else {"memory" if isinstance(backend, InMemoryCacheBackend) else "redis": backend.stats()}
+
+    @classmethod
+    async def create_cache(cls, value: str, key: str, max_age: int, tags: tuple[str, ...] = (), versions: tuple[int, ...] | None = None) -> None:
+        await (await cls.get_backend()).set(key, value, max_age, tags, versions)
+
+    @classmethod
+    async def retrieve_cache(cls, key: str) -> tuple[str | None, int | None]:
+        return await (await cls.get_backend()).get(key)
+
+    @classmethod
+    async def delete_cache(cls, key: str) -> None:
+        await (await cls.get_backend()).delete(key)
+
+    @classmethod
+    async def clear_cache(cls) -> None:
+        await (await cls.get_backend()).clear()
+
+    @classmethod
+    async def tag_versions(cls, tags: tuple[str, ...]) -> tuple[int, ...]:
+        return await (await cls.get_backend()).tag_versions(tags)
+
+    @classmethod
+    async def invalidate_tags(cls, tags: tuple[str, ...]) -> None:
+        await (await cls.get_backend()).invalidate_tags(tags)
+
+    @classmethod
+    async def invalidate_tags_detached(cls, tags: tuple[str, ...]) -> None:
+        """``invalidate_tags`` for an event loop other than the app's (a sync session committing off the loop).
+
+        The process's memory tier is purged directly; Redis, when the cache uses it, over a
+        connection of its own, since the shared pool's belong to the app's loop. With the
+        Postgres bus nothing is broadcast: other workers' copies expire with their TTL.
+        """
+        backend = cls.backend
+        if isinstance(backend, TieredCacheBackend):
+            await backend.apply({"tags": list(tags)})
+        elif isinstance(backend, InMemoryCacheBackend):
+            await backend.invalidate_tags(tags)
+        redis = create_redis_client() if settings.CACHE_BACKEND == "redis" else None
+        if redis is None:
+            return
+        try:
+            await RedisCacheBackend(redis).invalidate_tags(tags)
+            await RedisInvalidationBus(redis).publish({"tags": list(tags)})
+        finally:
+            await redis.aclose()
+
+    @classmethod
+    async def acquire_lock(cls, key: str, ttl: float) -> str | None:
+        return await (await cls.get_backend()).acquire_lock(key, ttl)
+
+    @classmethod
+    async def release_lock(cls, key: str, token: str) -> None:
+        await (await cls.get_backend()).release_lock(key, token)